@@ -7,8 +7,13 @@
 # Summary: Hack Assembler that takes a .asm file and creates a binary .hack file.
 #
 
+import argparse
+import cProfile
 import os
+import pstats
 import sys
+import time
+from array import array
 
 
 class Parser:
@@ -17,8 +22,8 @@ class Parser:
     Loads the given Hack file and provides helper functions to parse the commands.
     """
 
-    def __init__(self, file_name: str):
-        """Opens the file and prepares for parsing."""
+    def __init__(self, file_name):
+        """Opens the file and prepares for parsing. An iterable of lines such as a file object can be given too."""
         # Current command that's being processed.
         self.cmd = ""
         # Current command index.
@@ -27,14 +32,15 @@ class Parser:
         self.commands = []
         # Open the file and prepare for parsing.
         # Remove all comments, empty lines, and whitespace characters.
-        file = open(file_name)
+        file = open(file_name) if isinstance(file_name, str) else file_name
         for line in file:
             line = line.partition("//")[0]
             line = line.strip()
             line = line.replace(" ", "")
             if line:
                 self.commands.append(line)
-        file.close()
+        if file is not file_name:
+            file.close()
 
     def hasMoreCommands(self) -> bool:
         """Checks if there are any more commands."""
@@ -94,6 +100,24 @@ class Parser:
         return ""
 
 
+def stream_commands(file):
+    """Yields the type and the text of every command in the given file object as it is read.
+
+    Only the current line is kept in memory, therefore it also works with sys.stdin.
+    """
+    for line in file:
+        # Remove all comments, empty lines, and whitespace characters.
+        line = line.partition("//")[0].strip().replace(" ", "")
+        if not line:
+            continue
+        if line[0] == "@":
+            yield "A", line[1:]
+        elif line[0] == "(":
+            yield "L", line[1:-1]
+        else:
+            yield "C", line
+
+
 class Code:
     """Hack Code Converter
 
@@ -158,6 +182,11 @@ class Code:
             "JMP": "111"
         }
 
+        # Integer tables with every field shifted into its position in the 16 bit word.
+        self.d_bits = {mnemonic: int(bits, 2) << 3 for mnemonic, bits in self.d_table.items()}
+        self.c_bits = {mnemonic: int(bits, 2) << 6 for mnemonic, bits in self.c_table.items()}
+        self.j_bits = {mnemonic: int(bits, 2) for mnemonic, bits in self.j_table.items()}
+
     def dest(self, mnemonic: str) -> str:
         """Returns the 3 bit binary code of the dest mnemonic."""
         return self.d_table[mnemonic]
@@ -170,6 +199,39 @@ class Code:
         """Returns the 3 bit binary code of the jump mnemonic."""
         return self.j_table[mnemonic]
 
+    def encode(self, command: str) -> int:
+        """Returns the 16 bit machine code of the given C command as an integer."""
+        # Split the C command into its destination, comparison, and jump parts.
+        dest, _, rest = command.rpartition("=")
+        comp, _, jump = rest.partition(";")
+        return 0b1110000000000000 | self.c_bits[comp] | self.d_bits[dest] | self.j_bits[jump]
+
+
+class CachedCode(Code):
+    """Hack Code Converter with Memoization
+
+    Remembers the binary code of every distinct C command, so repeated commands cost a single lookup.
+    """
+
+    def __init__(self):
+        """Setups the code converter and its empty cache."""
+        super().__init__()
+        # Binary codes of the C commands seen so far.
+        self.cache = {}
+        # Number of commands served from the cache and encoded from scratch.
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, command: str) -> int:
+        """Returns the 16 bit machine code of the given C command from the cache if possible."""
+        word = self.cache.get(command)
+        if word is None:
+            self.misses += 1
+            word = self.cache[command] = super().encode(command)
+        else:
+            self.hits += 1
+        return word
+
 
 class SymbolTable:
     """Hack Symbol Table
@@ -219,18 +281,376 @@ class SymbolTable:
         return self.table[symbol]
 
 
+class Assembler:
+    """Single-Pass Hack Assembler
+
+    Encodes the commands as they are read and backpatches forward symbol references.
+    """
+
+    def __init__(self, symbols: SymbolTable = None, coder: Code = None, placeholders: bool = False):
+        """Creates a new assembler with an optional symbol table and code converter.
+
+        Without placeholders, a pending symbol reference holds back every word after it, so memory grows with the
+        program when a variable or a forward label is referenced early. With placeholders, every word is drained
+        at once with 0 in place of the pending references, and the writer patches them in the output afterwards.
+        """
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.coder = coder if coder is not None else CachedCode()
+        self.placeholders = placeholders
+        # Machine codes that are not drained yet, None marks a pending symbol reference.
+        self.words = []
+        # Number of words that are drained and removed from the list.
+        self.base = 0
+        # Number of words at the start of the list that are already drained.
+        self.emitted = 0
+        # Pending symbols in the order of their first reference and their word addresses.
+        self.pending = {}
+        # Word addresses and values of the pending references that are resolved after they are drained.
+        self.patches = []
+        # User defined variables starts from memory position 16.
+        self.variable = 16
+
+    def add(self, command_type: str, text: str) -> None:
+        """Adds a command given by its type and its symbol or C-command text."""
+        if command_type == "A":
+            # Constant
+            if text.isdecimal():
+                self.words.append(int(text))
+            # Symbol
+            # (Either a label or a previously declared variable.)
+            elif self.symbols.contains(text):
+                self.words.append(self.symbols.getAddress(text))
+            # Forward Reference
+            # (Either a label defined later or a variable declaration.)
+            else:
+                self.pending.setdefault(text, []).append(self.base + len(self.words))
+                self.words.append(None)
+        elif command_type == "L":
+            address = self.base + len(self.words)
+            self.symbols.addEntry(text, address)
+            # Backpatch the earlier references as soon as the label is known.
+            if text in self.pending:
+                self.patch(self.pending.pop(text), address)
+        else:
+            self.words.append(self.coder.encode(text))
+
+    def patch(self, addresses: list, value: int) -> None:
+        """Replaces the pending references at the given word addresses with the value."""
+        for address in addresses:
+            if address < self.base:
+                self.patches.append((address, value))
+            else:
+                self.words[address - self.base] = value
+
+    def drain(self) -> list:
+        """Returns the machine codes that are resolved and not returned before.
+
+        Words are returned in program order, therefore a pending reference holds back every word after it
+        unless placeholders are used.
+        """
+        if self.placeholders:
+            ready = [0 if word is None else word for word in self.words]
+            self.base += len(self.words)
+            self.words = []
+            return ready
+        start = end = self.emitted
+        words = self.words
+        while end < len(words) and words[end] is not None:
+            end += 1
+        ready = words[start:end]
+        self.emitted = end
+        # Drop the drained words once they make up most of the list.
+        if end > 4096 and end * 2 > len(words):
+            del words[:end]
+            self.base += end
+            self.emitted = 0
+        return ready
+
+    def finish(self) -> list:
+        """Backpatches the pending symbols and returns the remaining machine codes of the program."""
+        for symbol, addresses in self.pending.items():
+            # Symbols that are never defined as labels are variable declarations.
+            self.symbols.addEntry(symbol, self.variable)
+            self.patch(addresses, self.variable)
+            self.variable += 1
+        self.pending = {}
+        return self.drain()
+
+
+def assemble(source) -> list:
+    """Assembles an in-memory program and returns its machine codes without touching the disk.
+
+    The source is either text, bytes, or an iterable of text or bytes lines such as a file object.
+    """
+    if isinstance(source, bytes):
+        source = source.decode()
+    if isinstance(source, str):
+        source = source.splitlines()
+    else:
+        # Lines of binary file objects are decoded as they are read.
+        source = (line.decode() if isinstance(line, bytes) else line for line in source)
+    assembler = Assembler()
+    for command_type, text in stream_commands(source):
+        assembler.add(command_type, text)
+    return assembler.finish()
+
+
+class OutputBuffer:
+    """Buffered Output
+
+    Accumulates the written text or bytes in memory and flushes them to the file in large chunks.
+    """
+
+    def __init__(self, file, buffer_size: int = 1 << 20):
+        """Setups the buffer in front of the given writable file object."""
+        self.file = file
+        # Number of characters or bytes to accumulate before flushing.
+        self.buffer_size = buffer_size
+        # Pending chunks and their total size.
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data) -> None:
+        """Adds the given text or bytes to the buffer and flushes the buffer if it is full."""
+        self.chunks.append(data)
+        self.size += len(data)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the pending chunks into the file."""
+        if self.chunks:
+            self.file.write(type(self.chunks[0])().join(self.chunks))
+            self.chunks = []
+            self.size = 0
+        self.file.flush()
+
+    def close(self) -> None:
+        """Flushes the pending chunks and closes the file."""
+        self.flush()
+        self.file.close()
+
+
+class HackWriter:
+    """Hack Output Writer
+
+    Writes machine codes either as .hack text lines or as packed big-endian 16 bit words.
+    """
+
+    def __init__(self, file, binary: bool = False, buffer_size: int = 1 << 20):
+        """Setups the writer for the given file name or writable file object."""
+        self.binary = binary
+        if isinstance(file, str):
+            file = open(file, "wb" if binary else "w")
+        self.file = OutputBuffer(file, buffer_size)
+        # Text lines of the machine codes written so far.
+        self.lines = {}
+
+    def write(self, words: list) -> None:
+        """Writes the given machine codes."""
+        if self.binary:
+            packed = array("H", words)
+            if sys.byteorder == "little":
+                packed.byteswap()
+            self.file.write(packed.tobytes())
+        else:
+            lines = self.lines
+            for word in words:
+                line = lines.get(word)
+                if line is None:
+                    line = lines[word] = format(word, "016b") + "\n"
+                self.file.write(line)
+
+    def patch(self, patches: list) -> None:
+        """Overwrites the words at the given addresses of a seekable output file with their values."""
+        self.file.flush()
+        file = self.file.file
+        # Every word takes 2 bytes or a line of 16 digits and the line separator of the platform.
+        width = 2 if self.binary else 16 + len(os.linesep)
+        for address, value in sorted(patches):
+            file.seek(address * width)
+            file.write(value.to_bytes(2, "big") if self.binary else format(value, "016b"))
+        file.seek(0, os.SEEK_END)
+
+    def flush(self) -> None:
+        """Flushes the buffered output into the file."""
+        self.file.flush()
+
+    def close(self) -> None:
+        """Flushes the buffered output and closes the file."""
+        self.file.close()
+
+
+class Statistics:
+    """Run Statistics
+
+    Records the wall time of consecutive phases and the counters of a run.
+    """
+
+    def __init__(self):
+        """Starts timing the first phase."""
+        self.phases = {}
+        self.counters = {}
+        self.start = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Ends the current phase with the given name and starts the next one."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + now - self.start
+        self.start = now
+
+    def count(self, counter: str, value: int = 1) -> None:
+        """Adds the value to the given counter."""
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def report(self, file=sys.stderr) -> None:
+        """Prints the phase times and the counters."""
+        total = sum(self.phases.values())
+        for phase, seconds in list(self.phases.items()) + [("total", total)]:
+            share = seconds / total * 100 if total else 0
+            print(phase.ljust(12) + format(seconds, "9.4f") + " s" + format(share, "7.1f") + " %", file=file)
+        for counter, value in self.counters.items():
+            print(counter + ": " + str(value), file=file)
+
+
+def count_lines(file_name: str) -> int:
+    """Returns the number of lines in the file."""
+    with open(file_name, "rb") as file:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: file.read(1 << 20), b""))
+
+
+def watch(options):
+    """Assembles the input file again whenever it changes, until it is interrupted."""
+    output_file_name = options.file.replace(".asm", ".hackbin" if options.binary else ".hack")
+    # Binary codes of the C-Commands stay cached between the builds.
+    coder = CachedCode()
+    state = None
+    print("Watching " + options.file + " (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                stat = os.stat(options.file)
+                if (stat.st_mtime_ns, stat.st_size) != state:
+                    state = (stat.st_mtime_ns, stat.st_size)
+                    assembler = Assembler(coder=coder)
+                    with open(options.file) as input_file:
+                        for command_type, text in stream_commands(input_file):
+                            assembler.add(command_type, text)
+                    words = assembler.finish()
+                    writer = HackWriter(output_file_name, options.binary, options.buffer_size)
+                    writer.write(words)
+                    writer.close()
+                    print("Assembled " + str(len(words)) + " words into " + output_file_name + " in " +
+                          format(time.perf_counter() - start, ".3f") + " s", flush=True)
+            # Keep watching, the file is assembled again after the next change.
+            except (NameError, KeyError, ValueError, OverflowError, OSError) as error:
+                print("Error: " + type(error).__name__ + ": " + str(error), flush=True)
+            time.sleep(options.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def argument_parser() -> argparse.ArgumentParser:
+    """Returns the parser of the command line arguments."""
+    arguments = argparse.ArgumentParser(prog="python " + os.path.basename(__file__),
+                                        description="Translates a Hack assembly file into a binary .hack file.")
+    arguments.add_argument("file", help="Hack assembly file (file.asm), or - to read stdin and write stdout")
+    arguments.add_argument("--single-pass", action="store_true",
+                           help="encode while reading and backpatch forward references at the end")
+    arguments.add_argument("--binary", action="store_true",
+                           help="write packed big-endian 16 bit words into a .hackbin file")
+    arguments.add_argument("--buffer-size", type=int, default=1 << 20,
+                           help="characters or bytes to buffer before writing (default: 1 MiB)")
+    arguments.add_argument("--watch", action="store_true",
+                           help="stay resident and assemble the file again whenever it changes")
+    arguments.add_argument("--interval", type=float, default=0.5,
+                           help="seconds between the checks of the watch mode (default: 0.5)")
+    arguments.add_argument("--stats", action="store_true",
+                           help="print the time of every phase and the symbol counts to stderr")
+    arguments.add_argument("--profile", metavar="FILE", help="write cProfile statistics of the run into FILE")
+    return arguments
+
+
 def main():
     """Arranges the parsing and code conversion of a Hack assembly file."""
 
-    # Check if a file name is given.
-    if len(sys.argv) != 2:
-        print("Error: Please provide a Hack assembly file.")
-        print("Usage: python " + os.path.basename(__file__) + " [file.asm]")
+    # Parse the command line arguments.
+    options = argument_parser().parse_args()
+
+    # Keep assembling in the watch mode.
+    if options.watch:
+        watch(options)
+        return
+
+    # Run the assembler, optionally under the profiler.
+    statistics = Statistics()
+    profiler = cProfile.Profile() if options.profile else None
+    if profiler is not None:
+        profiler.enable()
+    run(options, statistics)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(options.profile)
+
+    # Report where the time goes.
+    if options.stats:
+        if options.file != "-":
+            statistics.counters = {"lines in": count_lines(options.file), **statistics.counters}
+        statistics.report()
+        if profiler is not None:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(10)
+
+
+def run(options, statistics: Statistics):
+    """Assembles the input file of the command line options and records the statistics."""
+    extension = ".hackbin" if options.binary else ".hack"
+    # Stream the commands through a single-pass assembler and write the words as they are read.
+    # Pending references are written as placeholders and patched in the output file at the end, so only their
+    # addresses are kept in memory. Standard output cannot be patched, so it waits for the pending references.
+    # Standard input is always streamed.
+    input_file_name = options.file
+    if options.single_pass or input_file_name == "-":
+        if input_file_name == "-":
+            input_file = sys.stdin
+            writer = HackWriter(sys.stdout.buffer if options.binary else sys.stdout, options.binary,
+                                options.buffer_size)
+        else:
+            input_file = open(input_file_name)
+            writer = HackWriter(input_file_name.replace(".asm", extension), options.binary, options.buffer_size)
+        assembler = Assembler(placeholders=input_file is not sys.stdin)
+        statistics.lap("setup")
+        words = 0
+        for command_type, text in stream_commands(input_file):
+            assembler.add(command_type, text)
+            ready = assembler.drain()
+            words += len(ready)
+            writer.write(ready)
+        statistics.lap("assemble")
+        ready = assembler.finish()
+        words += len(ready)
+        writer.write(ready)
+        if assembler.patches:
+            writer.patch(assembler.patches)
+        statistics.lap("backpatch")
+        if input_file is sys.stdin:
+            writer.flush()
+        else:
+            input_file.close()
+            writer.close()
+        statistics.lap("write")
+        # Symbols that are not predefined are either labels or variables.
+        variables = assembler.variable - 16
+        statistics.count("words out", words)
+        statistics.count("labels", len(assembler.symbols.table) - len(SymbolTable().table) - variables)
+        statistics.count("variables", variables)
+        statistics.count("cache hits", assembler.coder.hits)
+        statistics.count("cache misses", assembler.coder.misses)
         return
 
     # Create a parser with the input file.
-    input_file_name = sys.argv[1]
     parser = Parser(input_file_name)
+    statistics.lap("parse")
 
     # Initiate the symbol table.
     symbols = SymbolTable()
@@ -248,13 +668,14 @@ def main():
 
     # Restart the file parser.
     parser.restart()
+    statistics.lap("symbols")
 
     # Initiate the binary coder.
-    coder = Code()
+    # Distinct C-Commands are few, so their binary codes are cached.
+    coder = CachedCode()
 
-    # Open the output file with the same name but .hack extension.
-    output_file_name = input_file_name.replace(".asm", ".hack")
-    file = open(output_file_name, "w")
+    # Collect the machine codes of the program.
+    words = []
 
     # User defined variables starts from memory position 16.
     variable = 16
@@ -277,20 +698,26 @@ def main():
                 num = variable
                 symbols.addEntry(symbol, num)
                 variable += 1
-            file.write(format(num, "016b"))
-            file.write("\n")
+            words.append(num)
         # C-Commands are made out of a destination, a comparison, and a jump part.
         elif parser.commandType() == "C":
-            # Obtain the binary coding from the coder and write it into the output file.
-            comp = coder.comp(parser.comp())
-            dest = coder.dest(parser.dest())
-            jump = coder.jump(parser.jump())
-            file.write("111" + comp + dest + jump)
-            file.write("\n")
+            # Obtain the machine code from the coder.
+            words.append(coder.encode(parser.cmd))
         else:
             # Hack file only contains the binary codes of A-Commands and C-Commands.
             pass
-    file.close()
+    statistics.lap("encode")
+
+    # Open the output file with the same name but .hack extension and write the program.
+    writer = HackWriter(input_file_name.replace(".asm", extension), options.binary, options.buffer_size)
+    writer.write(words)
+    writer.close()
+    statistics.lap("write")
+    statistics.count("words out", len(words))
+    statistics.count("labels", len(symbols.table) - len(SymbolTable().table) - (variable - 16))
+    statistics.count("variables", variable - 16)
+    statistics.count("cache hits", coder.hits)
+    statistics.count("cache misses", coder.misses)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,433 @@
+# File: HackEmulator.py
+# -----
+# Author: Ihsan TOPALOGLU (itopaloglu83@gmail.com)
+# Date: 18 October 2026
+# Course: Nand to Tetris, Part 1
+#
+# Summary: Hack Emulator that runs a .hack, .hackbin, or .asm program on the Hack computer.
+#
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+from HackAssembler import Assembler, Code, stream_commands
+
+# NumPy is only needed by the batch emulator.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Size of the addressable memory, RAM + Screen + Keyboard fit into 15 bit addresses.
+RAM_SIZE = 32768
+
+
+def is_halt_loop(rom: list, address: int) -> bool:
+    """Checks if the C-instruction at the address is an unconditional jump to the A-instruction right before it.
+
+    Such a loop never exits, but only halts the machine if it has no destination, like M=M+1;JMP keeps counting.
+    """
+    word = rom[address]
+    return word & 7 == 7 and (word >> 3) & 7 == 0 and address > 0 and rom[address - 1] == address - 1
+
+
+def comp_expression(mnemonic: str, memory: str = "ram[a & 32767]") -> str:
+    """Returns the Python expression of a comp mnemonic over the a, d, and memory variables."""
+    expression = mnemonic.replace("M", memory).replace("A", "a").replace("D", "d").replace("!", "~")
+    return "(" + expression + ") & 65535"
+
+
+# Handlers of the comp mnemonics keyed on their 7 bit codes.
+# Batch handlers take the memory values as an array argument instead of reading the ram.
+COMP_MNEMONICS = {}
+COMP_HANDLERS = {}
+BATCH_HANDLERS = {}
+for _mnemonic, _bits in Code().c_table.items():
+    COMP_MNEMONICS[int(_bits, 2)] = _mnemonic
+    COMP_HANDLERS[int(_bits, 2)] = eval("lambda a, d, ram: " + comp_expression(_mnemonic))
+    BATCH_HANDLERS[int(_bits, 2)] = eval("lambda a, d, m: " + comp_expression(_mnemonic, "m"))
+
+# Jump decisions of every jump code for a zero, positive, and negative result.
+JUMP_TABLE = [(bool(jump & 2), bool(jump & 1), bool(jump & 4)) for jump in range(8)]
+
+# Python conditions of the jump codes over the unsigned 16 bit result v.
+JUMP_CONDITIONS = ["False", "0 < v < 32768", "v == 0", "v < 32768",
+                   "v >= 32768", "v != 0", "v == 0 or v >= 32768", "True"]
+
+# Maximum number of instructions in a compiled block.
+MAX_BLOCK_SIZE = 256
+
+
+def load_program(file_name: str) -> list:
+    """Returns the machine code of a .hack, .hackbin, or .asm file."""
+    if file_name[-8:] == ".hackbin":
+        words = array("H")
+        with open(file_name, "rb") as file:
+            words.frombytes(file.read())
+        if sys.byteorder == "little":
+            words.byteswap()
+        return list(words)
+    if file_name[-4:] == ".asm":
+        assembler = Assembler()
+        with open(file_name) as file:
+            for command_type, text in stream_commands(file):
+                assembler.add(command_type, text)
+        return assembler.finish()
+    with open(file_name) as file:
+        return [int(line, 2) for line in file if line.strip()]
+
+
+class Emulator:
+    """Hack Emulator
+
+    Runs the Hack machine code after predecoding every ROM word into a small handler.
+    """
+
+    def __init__(self, rom: list = None, jit: bool = False):
+        """Creates the computer with an empty memory and loads the given program.
+
+        With jit, basic blocks of the program are compiled into Python functions.
+        """
+        self.jit = jit
+        # Data memory, including the screen and the keyboard memory maps.
+        self.ram = [0] * RAM_SIZE
+        # Registers.
+        self.a = 0
+        self.d = 0
+        self.pc = 0
+        # Number of instructions executed since the last reset.
+        self.cycles = 0
+        # Set when the program reaches an infinite loop like (END) @END 0;JMP.
+        self.halted = False
+        self.load(rom or [])
+
+    def load(self, rom: list) -> None:
+        """Loads the program into the ROM and predecodes it."""
+        self.rom = list(rom)
+        self.program = [self.decode(address, word) for address, word in enumerate(self.rom)]
+        # Compiled blocks of the old program are no longer valid.
+        self.blocks = {}
+        self.reset()
+
+    def decode(self, address: int, word: int):
+        """Returns the predecoded form of a ROM word.
+
+        A-instructions are kept as their values, C-instructions become (handler, dest, jump, halt) tuples.
+        """
+        if word & 0x8000 == 0:
+            return word
+        handler = COMP_HANDLERS.get((word >> 6) & 0x7F)
+        if handler is None:
+            raise NameError("Unexpected Instruction " + format(word, "016b") + " at " + str(address))
+        jump = JUMP_TABLE[word & 7] if word & 7 else None
+        halt = is_halt_loop(self.rom, address)
+        return handler, (word >> 3) & 7, jump, halt
+
+    def reset(self) -> None:
+        """Restarts the program without clearing the memory."""
+        self.pc = 0
+        self.cycles = 0
+        self.halted = False
+
+    def compile_block(self, start: int):
+        """Compiles the block at the start address into a Python function.
+
+        A block runs until a jump is taken or an unconditional jump is reached, and jumps back to its own
+        start stay inside the function while the cycle budget allows. The function takes ram, a, d, and the
+        budget and returns the next pc, a, d, the cycles run, and the halt flag.
+        """
+        lines = ["def block(ram, a, d, budget):", "    n = 0", "    while True:"]
+        # Value of A when it is known at compile time.
+        known = None
+        address = start
+        size = len(self.program)
+        while address < size and address - start < MAX_BLOCK_SIZE:
+            instruction = self.program[address]
+            word = self.rom[address]
+            address += 1
+            cycles = str(address - start)
+            # A-Instruction
+            if instruction.__class__ is int:
+                lines.append("        a = " + str(instruction))
+                known = instruction
+                continue
+            # C-Instruction
+            _, dest, jump, halt = instruction
+            target = known
+            memory = "ram[" + str(known & 32767) + "]" if known is not None else "ram[a & 32767]"
+            lines.append("        v = " + comp_expression(COMP_MNEMONICS[(word >> 6) & 0x7F], memory))
+            if jump is not None and target is None:
+                lines.append("        t = a")
+            if dest & 1:
+                lines.append("        " + memory + " = v")
+            if dest & 2:
+                lines.append("        d = v")
+            if dest & 4:
+                lines.append("        a = v")
+                known = None
+            if jump is None:
+                continue
+            indent = "        "
+            if word & 7 != 7:
+                lines.append("        if " + JUMP_CONDITIONS[word & 7] + ":")
+                indent += "    "
+            if halt:
+                lines.append(indent + "return " + str(address - 1) + ", a, d, n + " + cycles + ", True")
+            elif target == start:
+                # Loop back to the start if the budget allows another full pass.
+                lines.append(indent + "n += " + cycles)
+                lines.append(indent + "if n + " + str(MAX_BLOCK_SIZE) + " > budget:")
+                lines.append(indent + "    return " + str(start) + ", a, d, n, False")
+                lines.append(indent + "continue")
+            else:
+                lines.append(indent + "return " + ("t" if target is None else str(target)) + ", a, d, n + " +
+                             cycles + ", False")
+            if word & 7 == 7:
+                break
+        else:
+            lines.append("        return " + str(address) + ", a, d, n + " + str(address - start) + ", False")
+        namespace = {}
+        exec(compile("\n".join(lines), "<block " + str(start) + ">", "exec"), namespace)
+        return namespace["block"]
+
+    def run(self, max_cycles: int = None) -> int:
+        """Runs the program until it halts, leaves the ROM, or reaches max_cycles. Returns the cycles run."""
+        if not self.jit:
+            return self.interpret(max_cycles)
+        blocks = self.blocks
+        ram = self.ram
+        size = len(self.program)
+        a, d, pc = self.a, self.d, self.pc
+        limit = max_cycles if max_cycles is not None else float("inf")
+        cycles = 0
+        halted = self.halted
+        while pc < size and not halted:
+            # A block never runs more than MAX_BLOCK_SIZE cycles outside of its loops.
+            # Interpret the last instructions that might not fit into the budget.
+            if cycles + MAX_BLOCK_SIZE > limit:
+                self.a, self.d, self.pc = a, d, pc
+                self.cycles += cycles
+                return cycles + self.interpret(max_cycles - cycles)
+            block = blocks.get(pc)
+            if block is None:
+                block = blocks[pc] = self.compile_block(pc)
+            pc, a, d, count, halted = block(ram, a, d, limit - cycles)
+            cycles += count
+        self.a, self.d, self.pc = a, d, pc
+        self.halted = halted
+        self.cycles += cycles
+        return cycles
+
+    def interpret(self, max_cycles: int = None) -> int:
+        """Runs the program one instruction at a time. Returns the cycles run."""
+        if self.halted:
+            return 0
+        program = self.program
+        ram = self.ram
+        size = len(program)
+        a, d, pc = self.a, self.d, self.pc
+        limit = max_cycles if max_cycles is not None else -1
+        cycles = 0
+        while pc < size and cycles != limit:
+            instruction = program[pc]
+            cycles += 1
+            # A-Instruction
+            if instruction.__class__ is int:
+                a = instruction
+                pc += 1
+                continue
+            # C-Instruction
+            handler, dest, jump, halt = instruction
+            value = handler(a, d, ram)
+            target = a
+            # M is written into the address of A before A changes.
+            if dest & 1:
+                ram[a & 32767] = value
+            if dest & 2:
+                d = value
+            if dest & 4:
+                a = value
+            if jump is not None and jump[0 if value == 0 else (2 if value & 0x8000 else 1)]:
+                if halt:
+                    self.halted = True
+                    break
+                pc = target
+            else:
+                pc += 1
+        self.a, self.d, self.pc = a, d, pc
+        self.cycles += cycles
+        return cycles
+
+
+class BatchEmulator:
+    """Hack Batch Emulator
+
+    Runs the same program on many memory states in lockstep, keeping the registers and the RAM in NumPy arrays.
+    """
+
+    def __init__(self, rom: list, instances: int, ram_size: int = RAM_SIZE):
+        """Creates the given number of computers with empty memories and loads the program into all of them."""
+        if numpy is None:
+            raise ImportError("BatchEmulator requires NumPy")
+        self.instances = instances
+        # Data memories of the instances, one row of 16 bit words per instance.
+        # Programs must not address memory beyond ram_size.
+        self.ram = numpy.zeros((instances, ram_size), dtype=numpy.uint16)
+        # Registers of the instances.
+        self.a = numpy.zeros(instances, dtype=numpy.int32)
+        self.d = numpy.zeros(instances, dtype=numpy.int32)
+        self.pc = numpy.zeros(instances, dtype=numpy.int32)
+        # Number of instructions executed by every instance.
+        self.cycles = numpy.zeros(instances, dtype=numpy.int64)
+        self.halted = numpy.zeros(instances, dtype=bool)
+        self.load(rom)
+
+    def load(self, rom: list) -> None:
+        """Loads the program into the ROM and predecodes it."""
+        self.rom = list(rom)
+        self.program = []
+        for address, word in enumerate(self.rom):
+            if word & 0x8000 == 0:
+                self.program.append(word)
+                continue
+            comp = (word >> 6) & 0x7F
+            handler = BATCH_HANDLERS.get(comp)
+            if handler is None:
+                raise NameError("Unexpected Instruction " + format(word, "016b") + " at " + str(address))
+            jump = JUMP_TABLE[word & 7] if word & 7 else None
+            halt = is_halt_loop(self.rom, address)
+            # Handlers read the memory only if the a-bit is set.
+            self.program.append((handler, comp & 0x40, (word >> 3) & 7, jump, halt))
+
+    def run(self, max_cycles: int = None) -> int:
+        """Runs every instance until it halts, leaves the ROM, or reaches max_cycles. Returns the steps run."""
+        program = self.program
+        ram, a, d, pc = self.ram, self.a, self.d, self.pc
+        size = len(program)
+        steps = 0
+        while steps != max_cycles:
+            running = numpy.nonzero(~self.halted & (pc < size))[0]
+            if len(running) == 0:
+                break
+            steps += 1
+            self.cycles[running] += 1
+            # Instances at the same program counter execute the same instruction together.
+            pcs = pc[running]
+            for address in numpy.unique(pcs):
+                selected = running[pcs == address]
+                instruction = program[address]
+                # A-Instruction
+                if instruction.__class__ is int:
+                    a[selected] = instruction
+                    pc[selected] += 1
+                    continue
+                # C-Instruction
+                handler, uses_memory, dest, jump, halt = instruction
+                target = a[selected]
+                memory = ram[selected, target & 32767] if uses_memory else None
+                value = handler(target, d[selected], memory)
+                if numpy.ndim(value) == 0:
+                    value = numpy.full(len(selected), value, dtype=numpy.int32)
+                # M is written into the address of A before A changes.
+                if dest & 1:
+                    ram[selected, target & 32767] = value
+                if dest & 2:
+                    d[selected] = value
+                if dest & 4:
+                    a[selected] = value
+                if jump is None:
+                    pc[selected] += 1
+                    continue
+                zero = value == 0
+                negative = (value & 0x8000) != 0
+                taken = numpy.zeros(len(selected), dtype=bool)
+                if jump[0]:
+                    taken |= zero
+                if jump[1]:
+                    taken |= ~zero & ~negative
+                if jump[2]:
+                    taken |= negative
+                if halt:
+                    self.halted[selected[taken]] = True
+                    pc[selected[~taken]] += 1
+                else:
+                    pc[selected] = numpy.where(taken, target, pc[selected] + 1)
+        return steps
+
+
+def signed(value: int) -> int:
+    """Returns the two's complement value of a 16 bit word."""
+    return value - 65536 if value & 0x8000 else value
+
+
+def main():
+    """Arranges the loading and the execution of a Hack program."""
+
+    # Parse the command line arguments.
+    arguments = argparse.ArgumentParser(prog="python " + os.path.basename(__file__),
+                                        description="Runs a Hack program and prints the cycles and the memory.")
+    arguments.add_argument("file", help="Hack program (file.hack, file.hackbin, or file.asm)")
+    arguments.add_argument("--cycles", type=int, help="maximum number of instructions to run")
+    arguments.add_argument("--jit", action="store_true",
+                           help="compile basic blocks into Python functions")
+    arguments.add_argument("--set", action="append", default=[], metavar="ADDRESS=VALUE",
+                           help="initial memory value, can be repeated")
+    arguments.add_argument("--dump", default="0:16", metavar="START:END",
+                           help="memory range to print after running (default: 0:16)")
+    arguments.add_argument("--batch", type=int, metavar="N",
+                           help="run N instances in lockstep with NumPy")
+    arguments.add_argument("--random", action="append", default=[], metavar="ADDRESS=LOW:HIGH",
+                           help="random initial memory value of every batch instance, can be repeated")
+    options = arguments.parse_args()
+    start, _, end = options.dump.partition(":")
+    dump = range(int(start), int(end or start) + (0 if end else 1))
+
+    # Run the instances in lockstep and print the dump of the first few instances.
+    if options.batch:
+        emulator = BatchEmulator(load_program(options.file), options.batch)
+        for assignment in options.set:
+            address, _, value = assignment.partition("=")
+            emulator.ram[:, int(address)] = int(value) & 0xFFFF
+        for assignment in options.random:
+            address, _, bounds = assignment.partition("=")
+            low, _, high = bounds.partition(":")
+            values = [random.randint(int(low), int(high)) & 0xFFFF for _ in range(options.batch)]
+            emulator.ram[:, int(address)] = values
+        start = time.perf_counter()
+        steps = emulator.run(options.cycles)
+        elapsed = time.perf_counter() - start
+        total = int(emulator.cycles.sum())
+        print("Steps: " + str(steps) + ", Cycles: " + str(total) + " (" + str(int(emulator.halted.sum())) + " halted)")
+        print("Time: " + format(elapsed, ".3f") + " s")
+        if elapsed > 0:
+            print("Speed: " + format(total / elapsed / 1e6, ".2f") + " MIPS")
+        for instance in range(min(options.batch, 8)):
+            values = [str(signed(int(emulator.ram[instance, address]))) for address in dump]
+            print("Instance " + str(instance) + ": " + " ".join(values))
+        return
+
+    # Load the program and the initial memory values.
+    emulator = Emulator(load_program(options.file), options.jit)
+    for assignment in options.set:
+        address, _, value = assignment.partition("=")
+        emulator.ram[int(address)] = int(value) & 0xFFFF
+
+    # Run the program and measure the speed.
+    start = time.perf_counter()
+    emulator.run(options.cycles)
+    elapsed = time.perf_counter() - start
+
+    print("Cycles: " + str(emulator.cycles) + (" (halted)" if emulator.halted else ""))
+    print("Time: " + format(elapsed, ".3f") + " s")
+    if elapsed > 0:
+        print("Speed: " + format(emulator.cycles / elapsed / 1e6, ".2f") + " MIPS")
+    for address in dump:
+        print("RAM[" + str(address) + "] = " + str(signed(emulator.ram[address])))
+
+
+if __name__ == "__main__":
+    main()
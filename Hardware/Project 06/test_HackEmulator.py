@@ -0,0 +1,41 @@
+# File: test_HackEmulator.py
+# -----
+# Author: Ihsan TOPALOGLU (itopaloglu83@gmail.com)
+# Date: 18 October 2026
+# Course: Nand to Tetris, Part 1
+#
+# Summary: Tests of the halt detection of the Hack Emulator.
+#
+
+import pytest
+
+from HackAssembler import assemble
+from HackEmulator import BatchEmulator, Emulator, numpy
+
+
+@pytest.mark.parametrize("jit", [False, True])
+def test_halt_loop(jit):
+    """An unconditional jump to itself without a destination halts the machine."""
+    emulator = Emulator(assemble("@7\nD=A\n@R0\nM=D\n(END)\n@END\n0;JMP\n"), jit)
+    emulator.run(1000)
+    assert emulator.halted
+    assert emulator.ram[0] == 7
+
+
+@pytest.mark.parametrize("jit", [False, True])
+def test_loop_with_destination_does_not_halt(jit):
+    """A jump to itself that writes a destination keeps running."""
+    emulator = Emulator(assemble("(L)\n@L\nM=M+1;JMP\n"), jit)
+    emulator.run(100)
+    assert not emulator.halted
+    assert emulator.cycles == 100
+    assert emulator.ram[0] == 50
+
+
+@pytest.mark.skipif(numpy is None, reason="NumPy not installed")
+def test_batch_loop_with_destination_does_not_halt():
+    """The batch emulator only halts the instances in a loop without a destination."""
+    emulator = BatchEmulator(assemble("(L)\n@L\nM=M+1;JMP\n"), 2)
+    emulator.run(100)
+    assert not emulator.halted.any()
+    assert (emulator.ram[:, 0] == 50).all()
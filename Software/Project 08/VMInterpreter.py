@@ -0,0 +1,273 @@
+# File: VMInterpreter.py
+# -----
+# Author: Ihsan TOPALOGLU (itopaloglu83@gmail.com)
+# Date: 18 October 2026
+# Course: Nand to Tetris, Part 2
+# Project: 8
+#
+# Summary: Virtual Machine Interpreter that runs .vm files without translating them to assembly.
+#
+
+import argparse
+import os
+import time
+
+from VMTranslator import (ARITHMETIC_COMMANDS, C_ARITHMETIC, C_CALL, C_FUNCTION, C_GOTO, C_IF, C_LABEL, C_POP,
+                          C_PUSH, C_RETURN, SEGMENTS, Parser, list_input_files)
+
+# Opcodes of the predecoded instructions.
+# Push and pop are specialized by how the segment entry is addressed.
+PUSH_CONSTANT = 0
+PUSH_INDIRECT = 1
+PUSH_DIRECT = 2
+POP_INDIRECT = 3
+POP_DIRECT = 4
+ADD = 5
+SUB = 6
+NEG = 7
+EQ = 8
+GT = 9
+LT = 10
+AND = 11
+OR = 12
+NOT = 13
+GOTO = 14
+IF_GOTO = 15
+FUNCTION = 16
+CALL = 17
+RETURN = 18
+
+ARITHMETIC_OPCODES = {"add": ADD, "sub": SUB, "neg": NEG, "eq": EQ, "gt": GT, "lt": LT,
+                      "and": AND, "or": OR, "not": NOT}
+# Memory addresses of the segment base pointers and the fixed segments.
+BASE_REGISTERS = {"local": 1, "argument": 2, "this": 3, "that": 4}
+FIXED_SEGMENTS = {"pointer": 3, "temp": 5}
+
+
+class Interpreter:
+    """VM Interpreter
+
+    Predecodes the VM commands with resolved jump targets and runs them on a Hack memory layout.
+    """
+
+    def __init__(self, input_files: list):
+        """Loads and predecodes the given VM files."""
+        # Data memory with the same layout as the translated program.
+        self.ram = [0] * 32768
+        # Predecoded (opcode, argument, argument) instructions of all files.
+        self.program = []
+        # Instruction indexes of the functions.
+        self.functions = {}
+        # Number of VM commands executed.
+        self.steps = 0
+        # Set when the program reaches an infinite loop like label END, goto END.
+        self.halted = False
+        self.load(input_files)
+        self.reset()
+
+    def load(self, input_files: list) -> None:
+        """Predecodes the commands of the input files and resolves the labels, functions, and statics."""
+        labels = {}
+        statics = {}
+        unresolved = []
+        for input_file_name in input_files:
+            file_name = os.path.basename(input_file_name)[:-3]
+            function_name = "OS"
+            for record in Parser(input_file_name).remaining():
+                opcode = record.opcode
+                if opcode == C_PUSH or opcode == C_POP:
+                    push = opcode == C_PUSH
+                    segment = SEGMENTS[record.segment]
+                    index = record.index
+                    if segment == "constant":
+                        if not push:
+                            raise NameError("Cannot Pop Constant Segment")
+                        instruction = (PUSH_CONSTANT, index & 0xFFFF, 0)
+                    elif segment in BASE_REGISTERS:
+                        instruction = (PUSH_INDIRECT if push else POP_INDIRECT, BASE_REGISTERS[segment], index)
+                    elif segment in FIXED_SEGMENTS:
+                        instruction = (PUSH_DIRECT if push else POP_DIRECT, FIXED_SEGMENTS[segment] + index, 0)
+                    else:
+                        # Statics are allocated from 16 upward in the order the assembler would allocate them.
+                        symbol = file_name + "." + str(index)
+                        if symbol not in statics:
+                            statics[symbol] = 16 + len(statics)
+                        instruction = (PUSH_DIRECT if push else POP_DIRECT, statics[symbol], 0)
+                elif opcode == C_ARITHMETIC:
+                    instruction = (ARITHMETIC_OPCODES[ARITHMETIC_COMMANDS[record.segment]], 0, 0)
+                elif opcode == C_LABEL:
+                    # Labels only mark the index of the next instruction.
+                    labels[function_name + "$" + record.name] = len(self.program)
+                    continue
+                elif opcode == C_GOTO or opcode == C_IF:
+                    instruction = [GOTO if opcode == C_GOTO else IF_GOTO, function_name + "$" + record.name, 0]
+                    unresolved.append(len(self.program))
+                elif opcode == C_FUNCTION:
+                    function_name = record.name
+                    self.functions[function_name] = len(self.program)
+                    instruction = (FUNCTION, record.index, 0)
+                elif opcode == C_CALL:
+                    instruction = [CALL, record.name, record.index]
+                    unresolved.append(len(self.program))
+                elif opcode == C_RETURN:
+                    instruction = (RETURN, 0, 0)
+                else:
+                    raise NameError("Unsupported Command Type")
+                self.program.append(instruction)
+        # Replace the label and function names with instruction indexes.
+        for index in unresolved:
+            opcode, name, argument = self.program[index]
+            targets = self.functions if opcode == CALL else labels
+            if name not in targets:
+                raise NameError("Unknown Jump Target " + name)
+            self.program[index] = (opcode, targets[name], argument)
+
+    def reset(self) -> None:
+        """Runs the bootstrap code, which calls Sys.init if it exists."""
+        ram = self.ram
+        ram[0] = 256
+        self.pc = 0
+        self.steps = 0
+        self.halted = False
+        if "Sys.init" in self.functions:
+            # Same frame as the call in the bootstrap code, returning from it ends the program.
+            ram[256:261] = [len(self.program), ram[1], ram[2], ram[3], ram[4]]
+            ram[0] = 261
+            ram[2] = 256
+            ram[1] = 261
+            self.pc = self.functions["Sys.init"]
+
+    def run(self, max_steps: int = None) -> int:
+        """Runs the program until it halts, ends, or reaches max_steps. Returns the steps run."""
+        if self.halted:
+            return 0
+        program = self.program
+        ram = self.ram
+        size = len(program)
+        pc = self.pc
+        sp = ram[0]
+        limit = max_steps if max_steps is not None else -1
+        steps = 0
+        while pc < size and steps != limit:
+            opcode, argument, index = program[pc]
+            steps += 1
+            pc += 1
+            if opcode == PUSH_CONSTANT:
+                ram[sp] = argument
+                sp += 1
+            elif opcode == PUSH_INDIRECT:
+                ram[sp] = ram[ram[argument] + index]
+                sp += 1
+            elif opcode == PUSH_DIRECT:
+                ram[sp] = ram[argument]
+                sp += 1
+            elif opcode == POP_INDIRECT:
+                sp -= 1
+                ram[ram[argument] + index] = ram[sp]
+            elif opcode == POP_DIRECT:
+                sp -= 1
+                ram[argument] = ram[sp]
+            elif opcode <= NOT:
+                if opcode == NEG:
+                    ram[sp - 1] = -ram[sp - 1] & 0xFFFF
+                    continue
+                if opcode == NOT:
+                    ram[sp - 1] = ~ram[sp - 1] & 0xFFFF
+                    continue
+                sp -= 1
+                x = ram[sp - 1]
+                y = ram[sp]
+                if opcode == ADD:
+                    ram[sp - 1] = (x + y) & 0xFFFF
+                elif opcode == SUB:
+                    ram[sp - 1] = (x - y) & 0xFFFF
+                elif opcode == AND:
+                    ram[sp - 1] = x & y
+                elif opcode == OR:
+                    ram[sp - 1] = x | y
+                else:
+                    # Comparisons check the 16 bit difference like the translated code does.
+                    difference = (x - y) & 0xFFFF
+                    if opcode == EQ:
+                        result = difference == 0
+                    elif opcode == GT:
+                        result = 0 < difference < 0x8000
+                    else:
+                        result = difference >= 0x8000
+                    ram[sp - 1] = 0xFFFF if result else 0
+            elif opcode == GOTO:
+                if argument == pc - 1:
+                    self.halted = True
+                    pc -= 1
+                    break
+                pc = argument
+            elif opcode == IF_GOTO:
+                sp -= 1
+                if ram[sp]:
+                    pc = argument
+            elif opcode == FUNCTION:
+                for _ in range(argument):
+                    ram[sp] = 0
+                    sp += 1
+            elif opcode == CALL:
+                # push return_address, LCL, ARG, THIS, and THAT
+                ram[sp] = pc
+                ram[sp + 1:sp + 5] = ram[1:5]
+                sp += 5
+                # ARG = SP -5 -num_args, LCL = SP
+                ram[2] = sp - 5 - index
+                ram[1] = sp
+                pc = argument
+            else:
+                # Restore the caller frame and put the return value in place of the arguments.
+                frame = ram[1]
+                pc = ram[frame - 5]
+                ram[ram[2]] = ram[sp - 1]
+                sp = ram[2] + 1
+                ram[1:5] = ram[frame - 4:frame]
+        ram[0] = sp
+        self.pc = pc
+        self.steps += steps
+        return steps
+
+
+def signed(value: int) -> int:
+    """Returns the two's complement value of a 16 bit word."""
+    return value - 65536 if value & 0x8000 else value
+
+
+def main():
+    """Arranges the loading and the execution of a Virtual Machine program."""
+
+    # Parse the command line arguments.
+    arguments = argparse.ArgumentParser(prog="python " + os.path.basename(__file__),
+                                        description="Runs VM files and prints the steps and the memory.")
+    arguments.add_argument("path", help="VM file (file.vm) or a directory of VM files")
+    arguments.add_argument("--steps", type=int, help="maximum number of VM commands to run")
+    arguments.add_argument("--set", action="append", default=[], metavar="ADDRESS=VALUE",
+                           help="initial memory value after the bootstrap code, can be repeated")
+    arguments.add_argument("--dump", default="0:16", metavar="START:END",
+                           help="memory range to print after running (default: 0:16)")
+    options = arguments.parse_args()
+
+    # Load the program and the initial memory values.
+    input_files, _ = list_input_files(options.path)
+    interpreter = Interpreter(input_files)
+    for assignment in options.set:
+        address, _, value = assignment.partition("=")
+        interpreter.ram[int(address)] = int(value) & 0xFFFF
+
+    # Run the program and measure the speed.
+    start = time.perf_counter()
+    interpreter.run(options.steps)
+    elapsed = time.perf_counter() - start
+
+    print("Steps: " + str(interpreter.steps) + (" (halted)" if interpreter.halted else ""))
+    print("Time: " + format(elapsed, ".3f") + " s")
+    start, _, end = options.dump.partition(":")
+    for address in range(int(start), int(end or start) + (0 if end else 1)):
+        print("RAM[" + str(address) + "] = " + str(signed(interpreter.ram[address])))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,83 @@
 # Summary: Virtual Machine Translator that takes a .vm file and creates a .asm file.
 #
 
+import argparse
+import cProfile
+import functools
+import hashlib
+import io
 import os
+import pstats
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Version of the generated assembly, cached translations of other versions are ignored.
+TRANSLATOR_VERSION = "8.1"
+
+# Command type codes of the predecoded instructions.
+# The last three are the combined commands of the peephole optimizer.
+C_ARITHMETIC = 0
+C_PUSH = 1
+C_POP = 2
+C_LABEL = 3
+C_GOTO = 4
+C_IF = 5
+C_FUNCTION = 6
+C_CALL = 7
+C_RETURN = 8
+C_PUSH_ARITHMETIC = 9
+C_POP_PUSH = 10
+C_PUSH_POP = 11
+COMMAND_TYPES = ["C_ARITHMETIC", "C_PUSH", "C_POP", "C_LABEL", "C_GOTO", "C_IF", "C_FUNCTION", "C_CALL",
+                 "C_RETURN", "C_PUSH_ARITHMETIC", "C_POP_PUSH", "C_PUSH_POP"]
+
+# Segment codes of push and pop commands, and operator codes of arithmetic commands.
+SEGMENTS = ["constant", "local", "argument", "this", "that", "temp", "pointer", "static"]
+ARITHMETIC_COMMANDS = ["add", "sub", "neg", "eq", "gt", "lt", "and", "or", "not"]
+SEGMENT_CODES = {segment: code for code, segment in enumerate(SEGMENTS)}
+
+# Command type codes and operator codes of the first word of a command.
+KEYWORDS = {"push": (C_PUSH, 0), "pop": (C_POP, 0), "label": (C_LABEL, 0), "goto": (C_GOTO, 0),
+            "if-goto": (C_IF, 0), "function": (C_FUNCTION, 0), "call": (C_CALL, 0), "return": (C_RETURN, 0)}
+for _code, _command in enumerate(ARITHMETIC_COMMANDS):
+    KEYWORDS[_command] = (C_ARITHMETIC, _code)
+
+
+class Instruction:
+    """VM Instruction
+
+    A command tokenized once into its command type, segment or operator, index, and name.
+    """
+
+    __slots__ = ("opcode", "segment", "index", "name", "text", "second")
+
+    def __init__(self, opcode: int, segment: int = 0, index: int = 0, name: str = None, text: str = "",
+                 second=None):
+        """Creates an instruction. Combined instructions keep their second command in second."""
+        self.opcode = opcode
+        self.segment = segment
+        self.index = index
+        self.name = name
+        self.text = text
+        self.second = second
+
+
+def tokenize(line: str) -> Instruction:
+    """Returns the instruction of a command line without comments."""
+    words = line.split()
+    if words[0] not in KEYWORDS:
+        raise NameError("Unexpected Command Type")
+    opcode, segment = KEYWORDS[words[0]]
+    if opcode == C_PUSH or opcode == C_POP:
+        if words[1] not in SEGMENT_CODES:
+            raise NameError("Unexpected Segment")
+        return Instruction(opcode, SEGMENT_CODES[words[1]], int(words[2]), None, line)
+    if opcode == C_FUNCTION or opcode == C_CALL:
+        return Instruction(opcode, 0, int(words[2]), words[1], line)
+    if opcode == C_LABEL or opcode == C_GOTO or opcode == C_IF:
+        return Instruction(opcode, 0, 0, words[1], line)
+    return Instruction(opcode, segment, 0, None, line)
 
 
 class Parser:
@@ -18,23 +93,32 @@ class Parser:
     Loads the given VM file and provides helper functions to parse the commands.
     """
 
-    def __init__(self, file_name: str):
-        """Opens the file and prepares for parsing."""
+    def __init__(self, file_name):
+        """Opens the file and prepares for parsing. An iterable of lines such as a file object can be given too."""
         # Current command that's being processed.
         self.current_command = ""
+        self.instruction = None
         # Current command index.
         self.current = -1
-        # All commands from the input file.
+        # All commands from the input file and their instructions.
         self.commands = []
+        self.instructions = []
         # Open the file and prepare for parsing.
         # Remove all comments, empty lines, and whitespace characters.
-        file = open(file_name)
+        # Every distinct command is tokenized only once, repeated commands share their instruction.
+        tokenized = {}
+        file = open(file_name) if isinstance(file_name, str) else file_name
         for line in file:
             line = line.partition("//")[0]
             line = line.strip()
             if line:
+                instruction = tokenized.get(line)
+                if instruction is None:
+                    instruction = tokenized[line] = tokenize(line)
                 self.commands.append(line)
-        file.close()
+                self.instructions.append(instruction)
+        if file is not file_name:
+            file.close()
 
     def hasMoreCommands(self) -> bool:
         """Checks if there are any more commands."""
@@ -44,46 +128,39 @@ class Parser:
         """Reads the next command and makes it the current command."""
         self.current += 1
         self.current_command = self.commands[self.current]
+        self.instruction = self.instructions[self.current]
 
     def commandType(self) -> str:
         """Returns the type of the current command."""
-        # Define the list of known arithmetic commands.
-        arithmetic_commands = ["add", "sub", "neg",
-                               "eq", "gt", "lt", "and", "or", "not"]
-        # Extract the current command from the input line.
-        cmd = self.current_command.split(" ")[0]
-        # Determine the type of the current command.
-        if cmd in arithmetic_commands:
-            return "C_ARITHMETIC"
-        elif cmd == "push":
-            return "C_PUSH"
-        elif cmd == "pop":
-            return "C_POP"
-        elif cmd == "label":
-            return "C_LABEL"
-        elif cmd == "goto":
-            return "C_GOTO"
-        elif cmd == "if-goto":
-            return "C_IF"
-        elif cmd == "function":
-            return "C_FUNCTION"
-        elif cmd == "call":
-            return "C_CALL"
-        elif cmd == "return":
-            return "C_RETURN"
-        else:
-            raise NameError("Unexpected Command Type")
+        return COMMAND_TYPES[self.instruction.opcode]
 
     def arg1(self) -> str:
         """Returns the first argument of the current command. For C_ARITHMETIC returns the command itself. Should not be called for C_RETURN."""
-        if self.commandType() == "C_ARITHMETIC":
-            return self.current_command.split(" ")[0]
-        else:
-            return self.current_command.split(" ")[1]
+        instruction = self.instruction
+        if instruction.opcode == C_ARITHMETIC:
+            return ARITHMETIC_COMMANDS[instruction.segment]
+        if instruction.opcode == C_PUSH or instruction.opcode == C_POP:
+            return SEGMENTS[instruction.segment]
+        return instruction.name
 
     def arg2(self) -> int:
         """Returns the second argument of the current command. Only valid for C_PUSH, C_POP, C_FUNCTION, and C_RETURN."""
-        return int(self.current_command.split(" ")[2])
+        return self.instruction.index
+
+    def remaining(self) -> list:
+        """Returns the instructions of the remaining commands and moves past them."""
+        instructions = self.instructions[self.current + 1:]
+        if instructions:
+            self.current = len(self.commands) - 1
+            self.current_command = self.commands[-1]
+            self.instruction = self.instructions[-1]
+        return instructions
+
+    def restart(self) -> None:
+        """Restarts the parser for reprocessing."""
+        self.current_command = ""
+        self.instruction = None
+        self.current = -1
 
 
 class CodeWriter:
@@ -92,16 +169,28 @@ class CodeWriter:
     Converts the VM commands to assembly code and writes them into output file.
     """
 
-    def __init__(self, file_name: str):
-        """Setups the code converter for the given output file."""
-        # Open the output file for writing.
-        self.file = open(file_name, "w")
+    def __init__(self, file_name, buffer_size: int = 1 << 20, shared_runtime: bool = False):
+        """Setups the code converter for the given output file name or writable file object.
+
+        With shared_runtime, call, return, and comparison commands jump into single global routines.
+        """
+        # Open the output file for writing, the file object flushes the buffered output in large chunks.
+        if isinstance(file_name, str):
+            file_name = open(file_name, "w", buffering=buffer_size)
+        self.file = file_name
         # Store the file name for static label references.
         self.file_name = ""
+        # Prefix for generated labels, keeps them unique when files are translated separately.
+        self.label_scope = ""
+        # Use the shared runtime routines instead of inline code.
+        self.shared_runtime = shared_runtime
         # Store the function name for label references.
         self.function_name = "OS"
         # Create a label counter for unique label creation.
         self.label_counter = 0
+        # Number of assembly instructions per VM command type, only counted when it is set to a dict.
+        self.emitted = None
+        self.command_type = "bootstrap"
         # Symbols table for arithmetic operations and assembly symbols.
         self.symbols = {
             # Arithmetic Operators
@@ -138,6 +227,80 @@ class CodeWriter:
         self.write_function("OS", 0)
         # Call Sys.init for runtime.
         self.write_call("Sys.init", 0)
+        # Sys.init never returns, so the shared routines are placed after it.
+        if self.shared_runtime:
+            self.write_runtime()
+
+    def write_runtime(self):
+        """Writes the shared call, return, and comparison routines."""
+        # $$CALL expects the return address in D, number of arguments in R13, and function address in R14.
+        output = []
+        output.append("($$CALL)")
+        # push return_address
+        output.append("@SP")
+        output.append("A=M")
+        output.append("M=D")
+        output.append("@SP")
+        output.append("M=M+1")
+        # push LCL, ARG, THIS, and THAT
+        for segment in ["LCL", "ARG", "THIS", "THAT"]:
+            output.append("@" + segment)
+            output.append("D=M")
+            output.append("@SP")
+            output.append("A=M")
+            output.append("M=D")
+            output.append("@SP")
+            output.append("M=M+1")
+        # ARG = SP -5 -num_args
+        output.append("@SP")
+        output.append("D=M")
+        output.append("@R13")
+        output.append("D=D-M")
+        output.append("@5")
+        output.append("D=D-A")
+        output.append("@ARG")
+        output.append("M=D")
+        # LCL = SP
+        output.append("@SP")
+        output.append("D=M")
+        output.append("@LCL")
+        output.append("M=D")
+        # goto function_address
+        output.append("@R14")
+        output.append("A=M")
+        output.append("0;JMP")
+        self.write_to_file(output)
+        # $$RETURN is the inline return code behind a label.
+        self.write_to_file(["($$RETURN)"], False)
+        self.write_return_code()
+        # $$EQ, $$GT, and $$LT expect the return address in D.
+        for command in ["eq", "gt", "lt"]:
+            routine = "$$" + command.upper()
+            output = []
+            output.append("(" + routine + ")")
+            # Store return address in R15.
+            output.append("@R15")
+            output.append("M=D")
+            # Pop Stack into D and calculate the difference with Stack[-1].
+            output.append("@SP")
+            output.append("AM=M-1")
+            output.append("D=M")
+            output.append("A=A-1")
+            output.append("D=M-D")
+            # Set the Stack to True in anticipation.
+            output.append("M=-1")
+            output.append("@" + routine + "$TRUE")
+            output.append(self.symbols[command])
+            # Set the Stack[-1] to False
+            output.append("@SP")
+            output.append("A=M-1")
+            output.append("M=0")
+            output.append("(" + routine + "$TRUE)")
+            # goto return_address
+            output.append("@R15")
+            output.append("A=M")
+            output.append("0;JMP")
+            self.write_to_file(output)
 
     def set_file_name(self, file_name: str):
         """Informs the codewriter about the file being processed."""
@@ -165,8 +328,17 @@ class CodeWriter:
             output.append("@SP")
             output.append("A=M-1")
             output.append(self.symbols[command])
+        elif command in ["eq", "gt", "lt"] and self.shared_runtime:
+            return_label = self.label_scope + "CompLabel" + str(self.label_counter)
+            self.label_counter += 1
+            # Jump into the shared comparison routine with the return address in D.
+            output.append("@" + return_label)
+            output.append("D=A")
+            output.append("@$$" + command.upper())
+            output.append("0;JMP")
+            output.append("(" + return_label + ")")
         elif command in ["eq", "gt", "lt"]:
-            jump_label = "CompLabel" + str(self.label_counter)
+            jump_label = self.label_scope + "CompLabel" + str(self.label_counter)
             self.label_counter += 1
             # Pop Stack into D.
             output.append("@SP")
@@ -288,6 +460,93 @@ class CodeWriter:
         # Print assembly commands.
         self.write_to_file(output)
 
+    def segment_address(self, segment: str, index: int) -> list:
+        """Returns the code that loads the address of the given segment entry into A. It might overwrite D."""
+        output = []
+        if segment in ["temp", "pointer"]:
+            output.append("@" + str(int(self.symbols[segment][1:]) + index))
+        elif segment == "static":
+            output.append("@" + self.file_name + "." + str(index))
+        elif segment in ["local", "argument", "this", "that"]:
+            output.append(self.symbols[segment])
+            if index == 0:
+                output.append("A=M")
+            elif index == 1:
+                output.append("A=M+1")
+            else:
+                output.append("D=M")
+                output.append("@" + str(index))
+                output.append("A=D+A")
+        else:
+            raise NameError("Unexpected Segment")
+        return output
+
+    def write_push_arithmetic(self, index: int, command: str):
+        """Writes a push constant command followed by an add, sub, and, or or command."""
+        output = []
+        # Put the constant into D.
+        output.append("@" + str(index))
+        output.append("D=A")
+        # Access to Stack[-1] and use the Arithmetic Operator.
+        output.append("@SP")
+        output.append("A=M-1")
+        output.append(self.symbols[command])
+        self.write_to_file(output)
+
+    def write_pop_push(self, segment: str, index: int):
+        """Writes a pop command followed by a push of the same entry, which leaves the stack unchanged."""
+        output = []
+        if segment in ["local", "argument", "this", "that"] and index > 1:
+            # Put the target address into R13.
+            output.append("@" + str(index))
+            output.append("D=A")
+            output.append(self.symbols[segment])
+            output.append("D=D+M")
+            output.append("@R13")
+            output.append("M=D")
+            # Copy Stack[-1] to where R13 points to.
+            output.append("@SP")
+            output.append("A=M-1")
+            output.append("D=M")
+            output.append("@R13")
+            output.append("A=M")
+        else:
+            # Copy Stack[-1] to the target address.
+            output.append("@SP")
+            output.append("A=M-1")
+            output.append("D=M")
+            output += self.segment_address(segment, index)
+        output.append("M=D")
+        self.write_to_file(output)
+
+    def write_push_pop_move(self, source: str, source_index: int, target: str, target_index: int):
+        """Writes a push command followed by a pop command, which moves a value without using the stack."""
+        output = []
+        indirect = target in ["local", "argument", "this", "that"] and target_index > 1
+        if indirect:
+            # Put the target address into R13.
+            output.append("@" + str(target_index))
+            output.append("D=A")
+            output.append(self.symbols[target])
+            output.append("D=D+M")
+            output.append("@R13")
+            output.append("M=D")
+        # Put the source value into D.
+        if source == "constant":
+            output.append("@" + str(source_index))
+            output.append("D=A")
+        else:
+            output += self.segment_address(source, source_index)
+            output.append("D=M")
+        # Put D value into the target address.
+        if indirect:
+            output.append("@R13")
+            output.append("A=M")
+        else:
+            output += self.segment_address(target, target_index)
+        output.append("M=D")
+        self.write_to_file(output)
+
     def write_label(self, label: str):
         """Writes the aseembly label."""
         label_name = self.function_name + "$" + label
@@ -331,10 +590,27 @@ class CodeWriter:
         # Saves the current memory segments and initiates new ones for the called function.
         # return_label is created using the name of the caller function.
         # return_label = file_name.function_name$ret.i
-        return_label = self.function_name + "$ret." + str(self.label_counter)
+        return_label = self.label_scope + self.function_name + "$ret." + str(self.label_counter)
         self.label_counter += 1
         # Output stream is initiated.
         output = []
+        if self.shared_runtime:
+            # Pass the arguments in R13 and R14, and the return address in D.
+            output.append("@" + str(num_args))
+            output.append("D=A")
+            output.append("@R13")
+            output.append("M=D")
+            output.append("@" + function_name)
+            output.append("D=A")
+            output.append("@R14")
+            output.append("M=D")
+            output.append("@" + return_label)
+            output.append("D=A")
+            output.append("@$$CALL")
+            output.append("0;JMP")
+            output.append("(" + return_label + ")")
+            self.write_to_file(output)
+            return
         # push return_label
         output.append("@" + return_label)
         output.append("D=A")
@@ -375,6 +651,13 @@ class CodeWriter:
 
     def write_return(self):
         """Writes the return code of a function call."""
+        if self.shared_runtime:
+            self.write_to_file(["@$$RETURN", "0;JMP"])
+        else:
+            self.write_return_code()
+
+    def write_return_code(self):
+        """Writes the inline code that returns from a function call."""
         # Saves the return value and restores the previous call stack.
         # Output stream is initiated.
         output = []
@@ -416,32 +699,514 @@ class CodeWriter:
         output.append("0;JMP")
         self.write_to_file(output)
 
+    def write_instruction(self, instruction: Instruction):
+        """Writes the translation of a predecoded instruction."""
+        opcode = instruction.opcode
+        self.command_type = COMMAND_TYPES[opcode]
+        # Write the current command as a comment to the output file for debugging purposes.
+        self.comment(instruction.text)
+        if opcode == C_PUSH or opcode == C_POP:
+            # Pass the push/pop command with its arguments.
+            self.write_push_pop(COMMAND_TYPES[opcode], SEGMENTS[instruction.segment], instruction.index)
+        elif opcode == C_ARITHMETIC:
+            # Pass the arithmetic command.
+            self.write_arithmetic(ARITHMETIC_COMMANDS[instruction.segment])
+        elif opcode == C_LABEL:
+            # Define label.
+            self.write_label(instruction.name)
+        elif opcode == C_GOTO:
+            # Unconditional jump to label.
+            self.write_goto(instruction.name)
+        elif opcode == C_IF:
+            # Conditional jump to label.
+            self.write_if(instruction.name)
+        elif opcode == C_FUNCTION:
+            # Define a function with number of variables.
+            self.write_function(instruction.name, instruction.index)
+        elif opcode == C_CALL:
+            # Call a function with number of arguments.
+            self.write_call(instruction.name, instruction.index)
+        elif opcode == C_RETURN:
+            # Return from the current function.
+            self.write_return()
+        # Combined instructions of the optimizer keep their second command.
+        elif opcode == C_PUSH_ARITHMETIC:
+            self.write_push_arithmetic(instruction.index, ARITHMETIC_COMMANDS[instruction.second.segment])
+        elif opcode == C_POP_PUSH:
+            self.write_pop_push(SEGMENTS[instruction.segment], instruction.index)
+        elif opcode == C_PUSH_POP:
+            second = instruction.second
+            self.write_push_pop_move(SEGMENTS[instruction.segment], instruction.index,
+                                     SEGMENTS[second.segment], second.index)
+        else:
+            raise NameError("Unsupported Command Type")
+
     def write_to_file(self, output: list, new_line=True):
         """Writes a given list of output."""
         # Add an empty line for debug purposes.
         if new_line:
             output.append("")
-        # Write every line to the output file.
+        if self.emitted is not None:
+            self.count_instructions(output)
+        # Write every line to the output buffer at once.
+        self.file.write("\n".join(output) + "\n")
+
+    def count_instructions(self, output: list):
+        """Counts the instructions of the output for the current command type."""
+        # Labels and comments are not instructions.
+        count = 0
         for line in output:
-            print(line, file=self.file)
+            if line and line[0] != "(" and line[0] != "/":
+                count += 1
+        self.emitted[self.command_type] = self.emitted.get(self.command_type, 0) + count
+
+    def write_fragment(self, fragment: str):
+        """Writes an already translated assembly fragment."""
+        self.file.write(fragment)
+
+    def flush(self):
+        """Flushes the buffered output into the output file."""
+        self.file.flush()
 
     def close(self):
         """Closes the output file."""
         self.file.close()
 
 
-def main():
-    """Arranges the parsing and code conversion of a Virtual Machine file."""
+def load_assembler():
+    """Imports the Hack assembler of project 6 for the fused pipeline.
 
-    # Check if an input file or a directory is given.
-    if len(sys.argv) != 2:
-        print("Error: No input file is found.")
-        print("Usage: python " + __file__ + " [file.vm] | [directory]")
-        return
+    The assembler is only needed by --hack, so plain translation works outside of this repository too.
+    """
+    directory = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                              "..", "..", "Hardware", "Project 06"))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    import HackAssembler
+    return HackAssembler
 
-    # Extract input files and setup the output file name.
+
+class HackCodeWriter(CodeWriter):
+    """VM to Hack Converter
+
+    Passes the generated assembly commands straight into the Hack assembler and writes the machine codes,
+    so the assembly is never joined into text and parsed again.
+    """
+
+    def __init__(self, file_name, buffer_size: int = 1 << 20, shared_runtime: bool = False,
+                 binary: bool = False):
+        """Setups the converter for the given .hack or .hackbin file name or writable file object."""
+        super().__init__(io.StringIO(), buffer_size, shared_runtime)
+        assembler = load_assembler()
+        self.assembler = assembler.Assembler()
+        self.writer = assembler.HackWriter(file_name, binary, buffer_size)
+        self.stream_commands = assembler.stream_commands
+
+    def comment(self, input: str):
+        """Comments are not assembled."""
+        pass
+
+    def write_to_file(self, output: list, new_line=True):
+        """Assembles a given list of output."""
+        if self.emitted is not None:
+            self.count_instructions(output)
+        add = self.assembler.add
+        for line in output:
+            # The generated lines have no comments or spaces, so their first character is their type.
+            if not line:
+                continue
+            if line[0] == "@":
+                add("A", line[1:])
+            elif line[0] == "(":
+                add("L", line[1:-1])
+            else:
+                add("C", line)
+        self.writer.write(self.assembler.drain())
+
+    def write_fragment(self, fragment: str):
+        """Assembles an already translated assembly fragment."""
+        add = self.assembler.add
+        for command_type, text in self.stream_commands(fragment.splitlines()):
+            add(command_type, text)
+        self.writer.write(self.assembler.drain())
+
+    def flush(self):
+        """Flushes the resolved machine codes into the output file."""
+        self.writer.write(self.assembler.drain())
+        self.writer.flush()
+
+    def close(self):
+        """Resolves the remaining symbols and closes the output file."""
+        self.writer.write(self.assembler.finish())
+        self.writer.close()
+
+
+class Optimizer:
+    """Peephole Optimizer
+
+    Replaces adjacent VM command pairs with shorter combined translations.
+    """
+
+    def __init__(self):
+        """Setups the optimizer with zero hits for every rule."""
+        # Number of times each rule is applied.
+        self.hits = {
+            "C_PUSH_ARITHMETIC": 0,
+            "C_POP_PUSH": 0,
+            "C_PUSH_POP": 0
+        }
+
+    def optimize(self, instructions: list) -> list:
+        """Returns the instructions with the matching pairs replaced by combined instructions."""
+        output = []
+        i = 0
+        while i < len(instructions):
+            first = instructions[i]
+            second = instructions[i + 1] if i + 1 < len(instructions) else None
+            rule = self.match(first, second) if second is not None else None
+            if rule is not None:
+                self.hits[COMMAND_TYPES[rule]] += 1
+                output.append(Instruction(rule, first.segment, first.index, None,
+                                          first.text + "; " + second.text, second))
+                i += 2
+            else:
+                output.append(first)
+                i += 1
+        return output
+
+    def match(self, first: Instruction, second: Instruction):
+        """Returns the command type of the combined instruction of the two instructions, or None."""
+        if first.opcode == C_PUSH:
+            # push constant n, add
+            if first.segment == SEGMENT_CODES["constant"] and second.opcode == C_ARITHMETIC and \
+                    ARITHMETIC_COMMANDS[second.segment] in ["add", "sub", "and", "or"]:
+                return C_PUSH_ARITHMETIC
+            # push segment i, pop segment j
+            if second.opcode == C_POP and second.segment != SEGMENT_CODES["constant"]:
+                return C_PUSH_POP
+        # pop segment i, push segment i
+        if first.opcode == C_POP and second.opcode == C_PUSH and \
+                first.segment == second.segment and first.index == second.index:
+            return C_POP_PUSH
+        return None
+
+
+def call_graph(input_files) -> tuple:
+    """Returns the functions called by each function and the functions defined in each file.
+
+    The input files are a list of file names or a dict of file names and their parsers.
+    Calls made outside of any function are listed under the empty function name.
+    """
+    calls = {"": set()}
+    functions = {}
+    for input_file_name in input_files:
+        functions[input_file_name] = []
+        function_name = ""
+        if isinstance(input_files, dict):
+            parser = input_files[input_file_name]
+        else:
+            parser = Parser(input_file_name)
+        for instruction in parser.instructions:
+            if instruction.opcode == C_FUNCTION:
+                function_name = instruction.name
+                calls.setdefault(function_name, set())
+                functions[input_file_name].append(function_name)
+            elif instruction.opcode == C_CALL:
+                calls[function_name].add(instruction.name)
+    return calls, functions
+
+
+def reachable_functions(calls: dict, entry: str = "Sys.init") -> set:
+    """Returns the functions that can be reached from the entry function, or None if it is not defined."""
+    if entry not in calls:
+        return None
+    # Commands outside of functions always run, so their calls are reachable too.
+    reachable = {"", entry}
+    pending = ["", entry]
+    while pending:
+        for function_name in calls.get(pending.pop(), ()):
+            if function_name not in reachable:
+                reachable.add(function_name)
+                pending.append(function_name)
+    return reachable
+
+
+def prune_instructions(instructions: list, functions: set) -> list:
+    """Returns the instructions without the bodies of the functions that are not in the given set."""
+    output = []
+    keep = True
+    for instruction in instructions:
+        if instruction.opcode == C_FUNCTION:
+            keep = instruction.name in functions
+        if keep:
+            output.append(instruction)
+    return output
+
+
+def translate_commands(parser: Parser, code_writer: CodeWriter, optimizer: Optimizer = None,
+                       functions: set = None):
+    """Translates every remaining command of the parser with the code writer.
+
+    If a set of functions is given, only those functions are translated.
+    """
+    instructions = parser.remaining()
+    # Remove the unreachable functions.
+    if functions is not None:
+        instructions = prune_instructions(instructions, functions)
+    # Combine the command pairs that have shorter translations.
+    if optimizer is not None:
+        instructions = optimizer.optimize(instructions)
+    # Write translations of the instructions to the output file.
+    for instruction in instructions:
+        code_writer.write_instruction(instruction)
+
+
+def translate_fragment(input_file_name: str, shared_runtime: bool = False, optimize: bool = False,
+                       functions: set = None, statistics: bool = False, parser: Parser = None) -> tuple:
+    """Translates a single VM file into an assembly fragment that can be placed after any other fragment.
+
+    An already loaded parser of the file can be given. Returns the fragment, the optimizer hits, and the
+    generated labels and instructions per command type of the file.
+    """
+    file_name = os.path.basename(input_file_name)[:-3]
+    output = io.StringIO()
+    code_writer = CodeWriter(output, shared_runtime=shared_runtime)
+    code_writer.emitted = {} if statistics else None
+    code_writer.set_file_name(file_name)
+    # Generated labels are scoped with the file name, so every file can count its labels from zero.
+    code_writer.label_scope = file_name + "$"
+    optimizer = Optimizer() if optimize else None
+    if parser is None:
+        parser = Parser(input_file_name)
+    translate_commands(parser, code_writer, optimizer, functions)
+    code_writer.flush()
+    counters = {"labels": code_writer.label_counter, "emitted": code_writer.emitted or {}}
+    return output.getvalue(), optimizer.hits if optimize else {}, counters
+
+
+def source_lines(source):
+    """Returns the lines of an in-memory source given as text, bytes, or an iterable of text or bytes lines."""
+    if isinstance(source, bytes):
+        source = source.decode()
+    if isinstance(source, str):
+        return source.splitlines()
+    # Lines of binary file objects are decoded as they are read.
+    return (line.decode() if isinstance(line, bytes) else line for line in source)
+
+
+def translate(vm_sources, bootstrap: bool = True, shared_runtime: bool = False, optimize: bool = False,
+              prune: bool = False) -> str:
+    """Translates in-memory VM sources into assembly code and returns it without touching the disk.
+
+    The sources are a dict of file names and sources, a list of (file name, source) pairs, or a list of
+    file objects. A source is either text, bytes, or an iterable of lines. File names name the static
+    variables, so Main.vm and Main are the same.
+    """
+    if isinstance(vm_sources, dict):
+        vm_sources = vm_sources.items()
+    # Parse every source with its file name.
+    parsers = {}
+    for source in vm_sources:
+        if isinstance(source, tuple):
+            file_name, source = source
+        else:
+            file_name = source.name
+        file_name = os.path.basename(file_name)
+        if file_name[-3:] == ".vm":
+            file_name = file_name[:-3]
+        parsers[file_name] = Parser(source_lines(source))
+    output = io.StringIO()
+    code_writer = CodeWriter(output, shared_runtime=shared_runtime)
+    # Insert the bootstrap code.
+    if bootstrap:
+        code_writer.comment("Bootstrap Code")
+        code_writer.write_init()
+    # Without the bootstrap code the program starts at its first command, so the shared routines are jumped over.
+    elif shared_runtime:
+        code_writer.write_to_file(["@$$START", "0;JMP"])
+        code_writer.write_runtime()
+        code_writer.write_to_file(["($$START)"])
+    optimizer = Optimizer() if optimize else None
+    # Nothing is removed if the program has no Sys.init.
+    functions = reachable_functions(call_graph(parsers)[0]) if prune else None
+    for file_name, parser in parsers.items():
+        code_writer.set_file_name(file_name)
+        translate_commands(parser, code_writer, optimizer, functions)
+    code_writer.flush()
+    return output.getvalue()
+
+
+class Workspace:
+    """Translation Workspace
+
+    Keeps the parsers and the fragments of a VM program in memory, so a rebuild only translates the changed files.
+    """
+
+    def __init__(self, input_path: str, shared_runtime: bool = False, optimize: bool = False,
+                 prune: bool = False):
+        """Setups an empty workspace for the given VM file or directory."""
+        self.input_path = input_path
+        self.shared_runtime = shared_runtime
+        self.optimize = optimize
+        self.prune = prune
+        # Modification time and size of every input file whose fragment is up to date.
+        self.states = {}
+        # Parsers of the input files and their fragments with the functions kept by pruning.
+        self.parsers = {}
+        self.fragments = {}
+
+    def scan(self) -> dict:
+        """Returns the modification time and size of every input file."""
+        states = {}
+        for input_file_name in list_input_files(self.input_path)[0]:
+            stat = os.stat(input_file_name)
+            states[input_file_name] = (stat.st_mtime_ns, stat.st_size)
+        return states
+
+    def build(self, states: dict, code_writer: CodeWriter) -> int:
+        """Writes the program of the scanned input files with the code writer. Returns the translated files.
+
+        The code writer is not closed, the caller closes it whether the build succeeds or not.
+        """
+        # Parse only the new and changed files.
+        for input_file_name in states:
+            if self.states.get(input_file_name) != states[input_file_name]:
+                self.states.pop(input_file_name, None)
+                self.fragments.pop(input_file_name, None)
+                self.parsers[input_file_name] = Parser(input_file_name)
+        for input_file_name in list(self.parsers):
+            if input_file_name not in states:
+                del self.parsers[input_file_name]
+                self.fragments.pop(input_file_name, None)
+                self.states.pop(input_file_name, None)
+        # Reachable functions depend on every file, a fragment is only reused if it keeps the same functions.
+        functions = None
+        if self.prune:
+            calls, defined = call_graph(self.parsers)
+            functions = reachable_functions(calls)
+        translated = 0
+        for input_file_name, parser in self.parsers.items():
+            kept = None
+            if functions is not None:
+                kept = [name for name in defined[input_file_name] if name in functions]
+            fragment = self.fragments.get(input_file_name)
+            if fragment is None or fragment[1] != kept:
+                parser.restart()
+                self.fragments[input_file_name] = (translate_fragment(input_file_name, self.shared_runtime,
+                                                                      self.optimize, functions,
+                                                                      parser=parser)[0], kept)
+                translated += 1
+            # A file is only marked as built once its fragment is translated.
+            self.states[input_file_name] = states[input_file_name]
+        # Write the whole program in the input file order.
+        code_writer.comment("Bootstrap Code")
+        code_writer.write_init()
+        for input_file_name in states:
+            code_writer.write_fragment(self.fragments[input_file_name][0])
+        return translated
+
+
+class FragmentCache:
+    """Translation Cache
+
+    Stores translated assembly fragments on disk keyed on the contents of their VM files.
+    """
+
+    def __init__(self, directory: str, max_size: int = 64 << 20):
+        """Setups the cache in the given directory with a size limit in bytes."""
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, input_file_name: str, variant: str = "") -> str:
+        """Returns the cache key of a VM file translated with the given variant of options."""
+        # Static labels depend on the file name, so it is a part of the key.
+        digest = hashlib.sha256()
+        header = [TRANSLATOR_VERSION, os.path.basename(input_file_name), variant]
+        digest.update(("\n".join(header) + "\n").encode())
+        with open(input_file_name, "rb") as file:
+            digest.update(file.read())
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """Returns the cached fragment of the given key or None."""
+        path = os.path.join(self.directory, key + ".asm")
+        try:
+            with open(path) as file:
+                fragment = file.read()
+        except FileNotFoundError:
+            return None
+        # Mark the fragment as recently used.
+        os.utime(path)
+        return fragment
+
+    def put(self, key: str, fragment: str):
+        """Stores the fragment and evicts the least recently used ones over the size limit."""
+        path = os.path.join(self.directory, key + ".asm")
+        # Write into a temporary file first, so readers never see a partial fragment.
+        with open(path + ".tmp", "w") as file:
+            file.write(fragment)
+        os.replace(path + ".tmp", path)
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used fragments until the cache fits into its size limit."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name[-4:] == ".asm":
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
+
+
+class Statistics:
+    """Run Statistics
+
+    Records the wall time of consecutive phases and the counters of a run.
+    """
+
+    def __init__(self):
+        """Starts timing the first phase."""
+        self.phases = {}
+        self.counters = {}
+        self.start = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Ends the current phase with the given name and starts the next one."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + now - self.start
+        self.start = now
+
+    def count(self, counter: str, value: int = 1) -> None:
+        """Adds the value to the given counter."""
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def report(self, file=sys.stderr) -> None:
+        """Prints the phase times and the counters."""
+        total = sum(self.phases.values())
+        for phase, seconds in list(self.phases.items()) + [("total", total)]:
+            share = seconds / total * 100 if total else 0
+            print(phase.ljust(12) + format(seconds, "9.4f") + " s" + format(share, "7.1f") + " %", file=file)
+        for counter, value in self.counters.items():
+            print(counter + ": " + str(value), file=file)
+
+
+def count_lines(file_name: str) -> int:
+    """Returns the number of lines in the file."""
+    with open(file_name, "rb") as file:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: file.read(1 << 20), b""))
+
+
+def list_input_files(input_path: str) -> tuple:
+    """Returns the .vm files of the input path and the name of the output .asm file."""
     input_files = []
-    input_path = sys.argv[1]
     # File name is given.
     if os.path.isfile(input_path) and input_path[-3:] == ".vm":
         input_files.append(input_path)
@@ -451,8 +1216,8 @@ def main():
         # Remove trailing forward slash.
         if input_path[-1:] == "/":
             input_path = input_path[:-1]
-        # List all .vm files.
-        for file_name in os.listdir(input_path):
+        # List all .vm files in a deterministic order.
+        for file_name in sorted(os.listdir(input_path)):
             if file_name[-3:] == ".vm":
                 input_files.append(input_path + "/" + file_name)
         # Exit if no .vm file is found.
@@ -461,66 +1226,266 @@ def main():
         output_file_name = input_path + ".asm"
     else:
         raise NameError("Unknown Input Path")
+    return input_files, output_file_name
+
+
+def output_path(options, output_file_name: str) -> str:
+    """Returns the name of the output file of the command line options for the given .asm file name."""
+    if options.hack:
+        return output_file_name[:-4] + (".hackbin" if options.binary else ".hack")
+    return output_file_name
+
+
+def create_code_writer(options, output_file_name: str, file=None) -> tuple:
+    """Returns the code writer of the command line options and the name of its output file.
+
+    If a writable file object is given, the code writer writes into it instead of the output file.
+    """
+    output_file_name = output_path(options, output_file_name)
+    # The fused pipeline assembles the generated commands as they are written.
+    if options.hack:
+        code_writer = HackCodeWriter(output_file_name if file is None else file, options.buffer_size,
+                                     options.shared_runtime, options.binary)
+    else:
+        code_writer = CodeWriter(output_file_name if file is None else file, options.buffer_size,
+                                 options.shared_runtime)
+    return code_writer, output_file_name
+
+
+def build(options, workspace: Workspace, states: dict, start: float):
+    """Builds the scanned input files of the workspace into the output file of the command line options.
+
+    The program is written into a temporary file that only replaces the output file once the build succeeds,
+    so a failed build keeps the last good output.
+    """
+    assembly_file_name = list_input_files(options.path)[1]
+    output_file_name = output_path(options, assembly_file_name)
+    temporary_file_name = output_file_name + ".tmp"
+    file = open(temporary_file_name, "wb" if options.hack and options.binary else "w")
+    try:
+        code_writer = create_code_writer(options, assembly_file_name, file)[0]
+        try:
+            translated = workspace.build(states, code_writer)
+        finally:
+            code_writer.close()
+        os.replace(temporary_file_name, output_file_name)
+    finally:
+        file.close()
+        if os.path.exists(temporary_file_name):
+            os.remove(temporary_file_name)
+    print("Translated " + str(translated) + " of " + str(len(states)) + " files into " + output_file_name +
+          " in " + format(time.perf_counter() - start, ".3f") + " s", flush=True)
+
+
+def watch(options):
+    """Rebuilds the output whenever an input file changes, until it is interrupted."""
+    workspace = Workspace(options.path, options.shared_runtime, options.optimize, options.prune)
+    # Input files of the last failed build, they are not built again until one of them changes.
+    failed = None
+    print("Watching " + options.path + " (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            start = time.perf_counter()
+            states = None
+            try:
+                states = workspace.scan()
+                if states != workspace.states and states != failed:
+                    build(options, workspace, states, start)
+            # Keep watching, the files are built again after the next change.
+            except (NameError, ValueError, IndexError, KeyError, OSError) as error:
+                print("Error: " + type(error).__name__ + ": " + str(error), flush=True)
+                failed = states
+            time.sleep(options.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def argument_parser() -> argparse.ArgumentParser:
+    """Returns the parser of the command line arguments."""
+    arguments = argparse.ArgumentParser(prog="python " + os.path.basename(__file__),
+                                        description="Translates VM files into a single Hack assembly file.")
+    arguments.add_argument("path", help="VM file (file.vm) or a directory of VM files")
+    arguments.add_argument("--buffer-size", type=int, default=1 << 20,
+                           help="characters to buffer before writing (default: 1 MiB)")
+    arguments.add_argument("--jobs", type=int, default=1,
+                           help="number of processes that translate the files concurrently (default: 1)")
+    arguments.add_argument("--shared-runtime", action="store_true",
+                           help="call shared routines for call, return, eq, gt, and lt to shrink the output")
+    arguments.add_argument("--optimize", action="store_true",
+                           help="combine adjacent commands with a peephole optimizer, --stats reports the rule hits")
+    arguments.add_argument("--prune", action="store_true",
+                           help="translate only the functions that are reachable from Sys.init, --stats reports "
+                                "how many")
+    arguments.add_argument("--cache", action="store_true",
+                           help="reuse the translations of unchanged files from a .vmcache directory")
+    arguments.add_argument("--cache-dir", help="cache directory (default: .vmcache next to the input)")
+    arguments.add_argument("--cache-size", type=int, default=64 << 20,
+                           help="cache size limit in bytes (default: 64 MiB)")
+    arguments.add_argument("--hack", action="store_true",
+                           help="assemble the translation directly into a .hack file without writing assembly")
+    arguments.add_argument("--binary", action="store_true",
+                           help="with --hack, write packed big-endian 16 bit words into a .hackbin file")
+    arguments.add_argument("--watch", action="store_true",
+                           help="stay resident and rebuild whenever an input file changes, only changed files are "
+                                "translated again")
+    arguments.add_argument("--interval", type=float, default=0.5,
+                           help="seconds between the checks of the watch mode (default: 0.5)")
+    arguments.add_argument("--stats", action="store_true",
+                           help="print the time of every phase, the labels, and the instructions per command type "
+                                "to stderr")
+    arguments.add_argument("--profile", metavar="FILE", help="write cProfile statistics of the run into FILE")
+    return arguments
+
+
+def main():
+    """Arranges the parsing and code conversion of a Virtual Machine file."""
+
+    # Parse the command line arguments.
+    options = argument_parser().parse_args()
+
+    # Keep rebuilding in the watch mode.
+    if options.watch:
+        watch(options)
+        return
+
+    # Run the translator, optionally under the profiler.
+    statistics = Statistics()
+    profiler = cProfile.Profile() if options.profile else None
+    if profiler is not None:
+        profiler.enable()
+    run(options, statistics)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(options.profile)
+
+    # Report where the time goes.
+    if options.stats:
+        statistics.report()
+        if profiler is not None:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(10)
+
+
+def run(options, statistics: Statistics):
+    """Translates the input path of the command line options and records the statistics."""
+
+    # Extract input files and setup the output file name.
+    input_files, output_file_name = list_input_files(options.path)
 
     # Create a code writer with the output file.
-    code_writer = CodeWriter(output_file_name)
+    code_writer, output_file_name = create_code_writer(options, output_file_name)
+    code_writer.emitted = {} if options.stats else None
 
     # Insert the bootstrap code.
     code_writer.comment("Bootstrap Code")
     code_writer.write_init()
 
-    # Loop over input files and translate them into one single assembly file.
-    for input_file_name in input_files:
-        # Set the file name for code writer.
-        file_name = input_file_name.split("/")[-1][:-3]
-        code_writer.set_file_name(file_name)
+    # Peephole optimizer and its rule hits over all translated files.
+    optimizer = Optimizer() if options.optimize else None
+    statistics.lap("setup")
 
-        # Create a parser with the input file.
-        parser = Parser(input_file_name)
+    # Find the functions that are reachable from Sys.init over the whole program.
+    # Nothing is removed if the program has no Sys.init.
+    functions = None
+    if options.prune:
+        calls, defined = call_graph(input_files)
+        functions = reachable_functions(calls)
+        if functions is not None:
+            statistics.count("functions", len(calls) - 1)
+            statistics.count("reachable functions", len(functions) - 1)
+        statistics.lap("call graph")
 
-        # Scan the input file for VM commands and write translations to the output file.
-        while parser.hasMoreCommands():
-            parser.advance()
-            # Write the current command as a comment to the output file for debugging purposes.
-            code_writer.comment(parser.current_command)
-            # Determine the current command type.
-            # C_ARITHMETIC, C_PUSH, or C_POP.
-            command_type = parser.commandType()
-            if command_type == "C_ARITHMETIC":
-                # Pass the arithmetic command to the code writer.
-                code_writer.write_arithmetic(parser.arg1())
-            elif command_type in ["C_PUSH", "C_POP"]:
-                # Pass the push/pop command to the code writer with its arguments.
-                segment = parser.arg1()
-                index = parser.arg2()
-                code_writer.write_push_pop(command_type, segment, index)
-            elif command_type == "C_LABEL":
-                # Define label.
-                code_writer.write_label(parser.arg1())
-            elif command_type == "C_GOTO":
-                # Unconditional jump to label.
-                code_writer.write_goto(parser.arg1())
-            elif command_type == "C_IF":
-                # Conditional jump to label.
-                code_writer.write_if(parser.arg1())
-            elif command_type == "C_FUNCTION":
-                # Define a function with number of variables.
-                function_name = parser.arg1()
-                num_vars = parser.arg2()
-                code_writer.write_function(function_name, num_vars)
-            elif command_type == "C_CALL":
-                # Call a function with number of arguments.
-                function_name = parser.arg1()
-                num_args = parser.arg2()
-                code_writer.write_call(function_name, num_args)
-            elif command_type == "C_RETURN":
-                # Return from the current function.
-                code_writer.write_return()
-            else:
-                raise NameError("Unsupported Command Type")
+    # Labels and instructions of the separately translated fragments.
+    labels = 0
+    emitted = {}
+
+    # Translate the files separately into fragments and merge them in the input file order.
+    # Fragments are taken from the cache when possible and the rest are translated concurrently.
+    if options.jobs > 1 or options.cache:
+        translate_file = functools.partial(translate_fragment, shared_runtime=options.shared_runtime,
+                                           optimize=options.optimize, functions=functions,
+                                           statistics=options.stats)
+        # Options that change the generated code are a part of the cache key.
+        variant = ""
+        if options.shared_runtime:
+            variant += "shared-runtime "
+        if options.optimize:
+            variant += "optimize "
+        fragments = {}
+        if options.cache:
+            cache_dir = options.cache_dir
+            if cache_dir is None:
+                cache_dir = os.path.join(os.path.dirname(input_files[0]), ".vmcache")
+            cache = FragmentCache(cache_dir, options.cache_size)
+            keys = {}
+            for input_file_name in input_files:
+                # Pruned fragments also depend on which of their functions are kept.
+                file_variant = variant
+                if functions is not None:
+                    kept = [name for name in defined[input_file_name] if name in functions]
+                    file_variant += "prune " + ",".join(kept)
+                keys[input_file_name] = cache.key(input_file_name, file_variant)
+                fragment = cache.get(keys[input_file_name])
+                if fragment is not None:
+                    fragments[input_file_name] = fragment
+            statistics.lap("cache")
+            statistics.count("cached files", len(fragments))
+        changed_files = [name for name in input_files if name not in fragments]
+        if options.jobs > 1 and len(changed_files) > 1:
+            with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+                translated = list(executor.map(translate_file, changed_files))
+        else:
+            translated = [translate_file(name) for name in changed_files]
+        statistics.lap("translate")
+        for input_file_name, (fragment, hits, counters) in zip(changed_files, translated):
+            fragments[input_file_name] = fragment
+            for rule in hits:
+                optimizer.hits[rule] += hits[rule]
+            labels += counters["labels"]
+            for command_type, count in counters["emitted"].items():
+                emitted[command_type] = emitted.get(command_type, 0) + count
+            if options.cache:
+                cache.put(keys[input_file_name], fragment)
+        for input_file_name in input_files:
+            code_writer.write_fragment(fragments[input_file_name])
+        statistics.lap("merge")
+    # Loop over input files and translate them into one single assembly file.
+    else:
+        for input_file_name in input_files:
+            # Set the file name for code writer.
+            file_name = input_file_name.split("/")[-1][:-3]
+            code_writer.set_file_name(file_name)
+
+            # Create a parser with the input file and translate its commands.
+            parser = Parser(input_file_name)
+            statistics.lap("parse")
+            translate_commands(parser, code_writer, optimizer, functions)
+            statistics.lap("translate")
 
     # Close the output file before exiting.
     code_writer.close()
+    statistics.lap("write")
+
+    # Count how many times each optimizer rule is applied.
+    # Fragments taken from the cache are not counted.
+    if optimizer is not None:
+        for rule, hits in optimizer.hits.items():
+            statistics.count("rule " + rule, hits)
+
+    # Count the lines, the labels, and the instructions of the whole output.
+    # Fragments taken from the cache are not counted in the labels and the instructions.
+    if options.stats:
+        statistics.count("files", len(input_files))
+        statistics.count("lines in", sum(count_lines(input_file_name) for input_file_name in input_files))
+        if options.hack and options.binary:
+            statistics.count("words out", os.path.getsize(output_file_name) // 2)
+        else:
+            statistics.count("lines out", count_lines(output_file_name))
+        statistics.count("labels generated", code_writer.label_counter + labels)
+        for command_type, count in code_writer.emitted.items():
+            emitted[command_type] = emitted.get(command_type, 0) + count
+        statistics.count("instructions", sum(emitted.values()))
+        for command_type, count in sorted(emitted.items(), key=lambda item: -item[1]):
+            statistics.count("  " + command_type, count)
 
 
 if __name__ == "__main__":
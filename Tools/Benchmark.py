@@ -0,0 +1,279 @@
+# File: Benchmark.py
+# -----
+# Author: Ihsan TOPALOGLU (itopaloglu83@gmail.com)
+# Date: 18 October 2026
+# Course: Nand to Tetris
+#
+# Summary: Benchmark of the Hack assembler and the VM translator on synthetic programs.
+#          Every phase is timed, peak memory is traced, and the results are stored in a JSON history.
+#
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Location of the benchmarked tools relative to this file.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSEMBLER_PATH = os.path.join(ROOT, "Hardware", "Project 06", "HackAssembler.py")
+TRANSLATOR_PATH = os.path.join(ROOT, "Software", "Project 08", "VMTranslator.py")
+
+# Benchmark cases with their generator settings at scale 1 and the command line options of the tool.
+CASES = {
+    "asm-labels": ("asm", {"lines": 100000, "labels": 5000, "variables": 100}, []),
+    "asm-variables": ("asm", {"lines": 100000, "labels": 100, "variables": 8000}, []),
+    "asm-single-pass": ("asm", {"lines": 100000, "labels": 5000, "variables": 100}, ["--single-pass"]),
+    "vm-calls": ("vm", {"files": 2, "functions": 500, "commands": 100, "depth": 200}, []),
+    "vm-files": ("vm", {"files": 200, "functions": 10, "commands": 50, "depth": 4}, []),
+    "vm-optimize": ("vm", {"files": 20, "functions": 50, "commands": 100, "depth": 20}, ["--optimize"]),
+    "vm-jobs": ("vm", {"files": 200, "functions": 10, "commands": 50, "depth": 4}, ["--jobs", "4"]),
+    "vm-cache": ("vm", {"files": 200, "functions": 10, "commands": 50, "depth": 4}, ["--cache"]),
+    "vm-prune": ("vm", {"files": 20, "functions": 50, "commands": 100, "depth": 20}, ["--prune"]),
+    "vm-shared-runtime": ("vm", {"files": 2, "functions": 500, "commands": 100, "depth": 200},
+                          ["--shared-runtime"]),
+}
+
+# Mnemonics of the generated C-Commands.
+DESTINATIONS = ["", "M=", "D=", "MD=", "A=", "AM=", "AD=", "AMD="]
+COMPUTATIONS = ["0", "1", "-1", "D", "A", "M", "!D", "-D", "D+1", "A+1", "M+1", "D-1", "A-1", "M-1",
+                "D+A", "D+M", "D-A", "D-M", "A-D", "M-D", "D&A", "D&M", "D|A", "D|M"]
+JUMPS = ["JGT", "JEQ", "JGE", "JLT", "JNE", "JLE", "JMP"]
+
+# Commands of the generated VM function bodies.
+SEGMENTS = [("local", 4), ("argument", 2), ("this", 8), ("that", 8), ("temp", 8), ("static", 16)]
+BINARY_COMMANDS = ["add", "sub", "and", "or", "eq", "gt", "lt"]
+UNARY_COMMANDS = ["neg", "not"]
+
+
+def load_module(name: str, path: str):
+    """Imports a tool from its file path, project directories have spaces in their names."""
+    if os.path.dirname(path) not in sys.path:
+        sys.path.insert(0, os.path.dirname(path))
+    specification = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(specification)
+    # Register the module, so the worker processes of --jobs can find its functions.
+    sys.modules[name] = module
+    specification.loader.exec_module(module)
+    return module
+
+
+def generate_asm(file_name: str, lines: int, labels: int, variables: int, seed: int = 0) -> None:
+    """Writes an assembly program with the given number of lines, labels, and variables."""
+    rng = random.Random(seed)
+    output = []
+    # Labels are spread evenly, so jumps go both forward and backward.
+    label_every = max(1, lines // max(1, labels))
+    label = 0
+    step = 0
+    while len(output) < lines or label < labels:
+        if step % label_every == 0 and label < labels:
+            output.append("(LOOP" + str(label) + ")")
+            label += 1
+        step += 1
+        choice = rng.random()
+        if choice < 0.15 and variables:
+            output.append("@var" + str(rng.randrange(variables)))
+        elif choice < 0.25 and labels:
+            output.append("@LOOP" + str(rng.randrange(labels)))
+            output.append("D;" + rng.choice(JUMPS))
+        elif choice < 0.45:
+            output.append("@" + str(rng.randrange(32768)))
+        else:
+            output.append(rng.choice(DESTINATIONS[1:]) + rng.choice(COMPUTATIONS) + "    // comment")
+    # Every variable appears at least once.
+    for variable in range(variables):
+        output.append("@var" + str(variable))
+    with open(file_name, "w") as file:
+        file.write("\n".join(output) + "\n")
+
+
+def generate_function(rng: random.Random, name: str, commands: int, callee: str) -> list:
+    """Returns the commands of a VM function that optionally calls the given callee."""
+    output = ["function " + name + " 4"]
+    depth = 0
+    label = 0
+    for _ in range(commands):
+        choice = rng.random()
+        if depth < 2 or choice < 0.35:
+            if rng.random() < 0.5:
+                output.append("push constant " + str(rng.randrange(100)))
+            else:
+                segment, size = rng.choice(SEGMENTS)
+                output.append("push " + segment + " " + str(rng.randrange(size)))
+            depth += 1
+        elif choice < 0.6:
+            output.append(rng.choice(BINARY_COMMANDS))
+            depth -= 1
+        elif choice < 0.65:
+            output.append(rng.choice(UNARY_COMMANDS))
+        elif choice < 0.7:
+            output.append("label L" + str(label))
+            output.append("if-goto L" + str(label))
+            label += 1
+            depth -= 1
+        else:
+            segment, size = rng.choice(SEGMENTS[:-1])
+            output.append("pop " + segment + " " + str(rng.randrange(size)))
+            depth -= 1
+    if callee:
+        output.append("call " + callee + " 2")
+    output.append("return")
+    return output
+
+
+def generate_vm(directory: str, files: int, functions: int, commands: int, depth: int, seed: int = 0) -> None:
+    """Writes a VM program of many files and functions with call chains of the given depth into the directory."""
+    rng = random.Random(seed)
+    names = [["File" + str(file) + ".f" + str(function) for function in range(functions)]
+             for file in range(files)]
+    # Function order of the call chains, each chain calls depth functions in different files.
+    order = [name for function in range(functions) for name in (names[file][function] for file in range(files))]
+    callees = {}
+    for i, name in enumerate(order):
+        if (i + 1) % depth and i + 1 < len(order):
+            callees[name] = order[i + 1]
+    # Sys.init calls the first function of every chain.
+    system = ["function Sys.init 0"]
+    for i in range(0, len(order), depth):
+        system += ["push constant 1", "push constant 2", "call " + order[i] + " 2", "pop temp 0"]
+    system += ["label END", "goto END"]
+    with open(os.path.join(directory, "Sys.vm"), "w") as file:
+        file.write("\n".join(system) + "\n")
+    for file_index in range(files):
+        output = []
+        for name in names[file_index]:
+            output += generate_function(rng, name, commands, callees.get(name))
+        with open(os.path.join(directory, "File" + str(file_index) + ".vm"), "w") as file:
+            file.write("\n".join(output) + "\n")
+
+
+def run_tool(tool, arguments: list) -> dict:
+    """Runs the tool on the given command line arguments through its own run function and returns the phase times."""
+    options = tool.argument_parser().parse_args(arguments)
+    statistics = tool.Statistics()
+    tool.run(options, statistics)
+    return statistics.phases
+
+
+def count_lines(path: str) -> int:
+    """Returns the number of lines in a file or in the .vm files of a directory."""
+    if os.path.isdir(path):
+        return sum(count_lines(os.path.join(path, name)) for name in os.listdir(path) if name[-3:] == ".vm")
+    with open(path, "rb") as file:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: file.read(1 << 20), b""))
+
+
+def git_commit() -> str:
+    """Returns the current commit of the repository, or an empty string outside of git."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    """Arranges the generation of the programs, the measurements, and the report."""
+
+    # Parse the command line arguments.
+    arguments = argparse.ArgumentParser(prog="python " + os.path.basename(__file__),
+                                        description="Benchmarks the assembler and the VM translator.")
+    arguments.add_argument("cases", nargs="*", help="cases to run (default: all), one of " + ", ".join(CASES))
+    arguments.add_argument("--scale", type=float, default=1.0,
+                           help="multiplier of the generated program sizes (default: 1)")
+    arguments.add_argument("--repeat", type=int, default=3, help="runs per case, the fastest is kept (default: 3)")
+    arguments.add_argument("--no-memory", action="store_true", help="skip the traced run for peak memory")
+    arguments.add_argument("--output", default="benchmark.json",
+                           help="JSON history to append the results to (default: benchmark.json)")
+    options = arguments.parse_args()
+    for case in options.cases:
+        if case not in CASES:
+            raise NameError("Unknown Case " + case)
+
+    assembler = load_module("HackAssembler", ASSEMBLER_PATH)
+    translator = load_module("VMTranslator", TRANSLATOR_PATH)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for case in options.cases or CASES:
+            tool, settings, flags = CASES[case]
+            settings = dict(settings)
+            # Generate the input program of the case.
+            for setting in ["lines", "labels", "variables", "files", "functions"]:
+                if setting in settings:
+                    settings[setting] = max(1, int(settings[setting] * options.scale))
+            if tool == "asm":
+                settings["variables"] = min(settings["variables"], 32768 - 16)
+                input_path = os.path.join(directory, case + ".asm")
+                generate_asm(input_path, **settings)
+                run = lambda: run_tool(assembler, [input_path] + flags)
+            else:
+                input_path = os.path.join(directory, case)
+                os.mkdir(input_path)
+                generate_vm(input_path, **settings)
+                run = lambda: run_tool(translator, [input_path] + flags)
+            # Keep the fastest time of every phase.
+            phases = {}
+            for _ in range(options.repeat):
+                for phase, seconds in run().items():
+                    phases[phase] = min(seconds, phases.get(phase, seconds))
+            result = {
+                "settings": settings,
+                "options": flags,
+                "lines_in": count_lines(input_path),
+                "lines_out": count_lines(os.path.join(directory, case + (".hack" if tool == "asm" else ".asm"))),
+                "phases": {phase: round(seconds, 4) for phase, seconds in phases.items()},
+                "total": round(sum(phases.values()), 4)
+            }
+            # Peak memory is traced in a separate run, tracing slows down the measured run.
+            if not options.no_memory:
+                tracemalloc.start()
+                run()
+                result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            results[case] = result
+
+    # Load the history to compare with the previous run of the same scale.
+    history = []
+    if os.path.isfile(options.output):
+        with open(options.output) as file:
+            history = json.load(file)
+    previous = {}
+    for entry in history:
+        if entry["scale"] == options.scale:
+            previous = entry["results"]
+
+    # Report the phase times and the change since the previous run.
+    for case, result in results.items():
+        print(case + ": " + str(result["lines_in"]) + " lines in, " + str(result["lines_out"]) + " lines out" +
+              (", peak " + format(result["peak_memory"] / (1 << 20), ".1f") + " MiB"
+               if "peak_memory" in result else ""))
+        for phase, seconds in list(result["phases"].items()) + [("total", result["total"])]:
+            line = "  " + phase.ljust(10) + format(seconds, "8.3f") + " s"
+            if case in previous:
+                before = previous[case]["total"] if phase == "total" else previous[case]["phases"].get(phase)
+                if before:
+                    line += format((seconds - before) / before * 100, "+8.1f") + " %"
+            print(line)
+
+    # Append the results to the history.
+    history.append({
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "scale": options.scale,
+        "results": results
+    })
+    with open(options.output, "w") as file:
+        json.dump(history, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1114 @@
+# File: HDLSimulator.py
+# -----
+# Author: Ihsan TOPALOGLU (itopaloglu83@gmail.com)
+# Date: 18 October 2026
+# Course: Nand to Tetris, Part 1
+#
+# Summary: Compiled gate-level simulator of the HDL chips.
+#          Chips are flattened into a netlist of Nand gates and DFFs, levelized, and compiled into
+#          straight-line Python code. Combinational chips can be tested bit-parallel against reference models.
+#          The netlist can be optimized with constant propagation, common subexpression elimination,
+#          and dead gate removal before it is compiled. Registers and memories can be replaced by behavioral
+#          models that are verified against their HDL versions.
+#
+
+import argparse
+import operator
+import os
+import random
+import re
+import time
+
+# NumPy is only needed by the bit-parallel tests.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Location of the HDL projects relative to this file.
+HARDWARE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Hardware")
+
+# Number of gates compiled into a single Python function.
+CHUNK_SIZE = 4096
+
+# Chips whose input pins add up to this many bits are tested with every input combination.
+EXHAUSTIVE_BITS = 24
+
+# Tokens of the HDL language, comments are removed before tokenizing.
+TOKEN = re.compile(r"\d+|[A-Za-z_][\w.]*|\.\.|[{}()\[\];,=:]")
+COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+class ChipDefinition:
+    """HDL Chip Definition
+
+    Contains the input and output pins of a chip and either its parts or its builtin model.
+    """
+
+    def __init__(self, name: str, inputs: list, outputs: list, parts: list = None, model=None, path: str = None):
+        """Creates a chip definition. Pins are (name, width) pairs.
+
+        Parts are (chip name, connections) pairs and every connection is a
+        (pin, pin start, pin end, wire, wire start, wire end) tuple, where None marks a whole bus.
+        """
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.parts = parts if parts is not None else []
+        self.model = model
+        self.path = path
+
+
+def parse_hdl(text: str, path: str = None) -> ChipDefinition:
+    """Returns the chip definition of an HDL text."""
+    tokens = TOKEN.findall(COMMENT.sub(" ", text))
+    position = 0
+
+    def take(expected: str = None) -> str:
+        """Returns the next token, which must be the expected one if it is given."""
+        nonlocal position
+        if position >= len(tokens):
+            raise NameError("Unexpected End of " + str(path))
+        token = tokens[position]
+        if expected is not None and token != expected:
+            raise NameError("Expected " + expected + " but found " + token + " in " + str(path))
+        position += 1
+        return token
+
+    def bit_range() -> tuple:
+        """Returns the optional [i] or [i..j] range after a name."""
+        if tokens[position] != "[":
+            return None, None
+        take("[")
+        start = end = int(take())
+        if tokens[position] == "..":
+            take("..")
+            end = int(take())
+        take("]")
+        return start, end
+
+    def pins() -> list:
+        """Returns the pins of an IN or OUT statement."""
+        output = []
+        while True:
+            name = take()
+            width = 1
+            if tokens[position] == "[":
+                take("[")
+                width = int(take())
+                take("]")
+            output.append((name, width))
+            if take() == ";":
+                return output
+
+    take("CHIP")
+    name = take()
+    take("{")
+    inputs = []
+    outputs = []
+    parts = []
+    while tokens[position] != "}":
+        keyword = take()
+        if keyword == "IN":
+            inputs = pins()
+        elif keyword == "OUT":
+            outputs = pins()
+        elif keyword == "PARTS":
+            take(":")
+            while tokens[position] != "}":
+                chip_name = take()
+                take("(")
+                connections = []
+                while True:
+                    pin = take()
+                    pin_start, pin_end = bit_range()
+                    take("=")
+                    wire = take()
+                    wire_start, wire_end = bit_range()
+                    connections.append((pin, pin_start, pin_end, wire, wire_start, wire_end))
+                    if take() == ")":
+                        break
+                take(";")
+                parts.append((chip_name, connections))
+        else:
+            raise NameError("Unexpected Keyword " + keyword + " in " + str(path))
+    return ChipDefinition(name, inputs, outputs, parts, path=path)
+
+
+class BehavioralChip:
+    """Behavioral Chip
+
+    A chip that is evaluated by Python code instead of gates.
+    Outputs are computed from the read pins only, the other inputs are sampled by the clock.
+    """
+
+    inputs = []
+    outputs = []
+    # Input pins that the outputs depend on combinationally.
+    read_pins = []
+    # Name of the chip the part is used under, set when the part is instantiated.
+    chip_name = None
+
+    def read(self, *values) -> tuple:
+        """Returns the output values for the values of the read pins."""
+        return ()
+
+    def tick(self, *values) -> None:
+        """Samples the values of all input pins at the rising edge of the clock."""
+        pass
+
+    def tock(self) -> None:
+        """Updates the state at the falling edge of the clock."""
+        pass
+
+
+class RAM(BehavioralChip):
+    """Memory of 16 bit words, sized by the subclasses."""
+
+    outputs = [("out", 16)]
+    read_pins = ["address"]
+    size = 0
+
+    def __init__(self):
+        """Creates a cleared memory."""
+        self.memory = [0] * self.size
+        self.pending = None
+
+    def read(self, address: int) -> tuple:
+        """Returns the word at the address."""
+        return self.memory[address],
+
+    def tick(self, value: int, load: int, address: int) -> None:
+        """Samples the word to write."""
+        self.pending = (address, value) if load else None
+
+    def tock(self) -> None:
+        """Writes the sampled word."""
+        if self.pending is not None:
+            self.memory[self.pending[0]] = self.pending[1]
+            self.pending = None
+
+
+class Screen(RAM):
+    """Screen memory map of 8K 16 bit words."""
+
+    inputs = [("in", 16), ("load", 1), ("address", 13)]
+    size = 8192
+
+
+class Keyboard(BehavioralChip):
+    """Keyboard memory map with the code of the pressed key."""
+
+    outputs = [("out", 16)]
+
+    def __init__(self):
+        """Creates a keyboard without a pressed key."""
+        self.key = 0
+
+    def read(self) -> tuple:
+        """Returns the code of the pressed key."""
+        return self.key,
+
+
+class ROM32K(BehavioralChip):
+    """Instruction memory of 32K 16 bit words."""
+
+    inputs = [("address", 15)]
+    outputs = [("out", 16)]
+    read_pins = ["address"]
+
+    def __init__(self):
+        """Creates an empty instruction memory."""
+        self.words = [0] * 32768
+
+    def load(self, words: list) -> None:
+        """Loads the machine codes of a program."""
+        self.words = list(words) + [0] * (32768 - len(words))
+
+    def read(self, address: int) -> tuple:
+        """Returns the instruction at the address."""
+        return self.words[address],
+
+
+class Register(BehavioralChip):
+    """16 bit register."""
+
+    inputs = [("in", 16), ("load", 1)]
+    outputs = [("out", 16)]
+
+    def __init__(self):
+        """Creates a cleared register."""
+        self.value = 0
+        self.next = 0
+
+    def read(self) -> tuple:
+        """Returns the stored value."""
+        return self.value,
+
+    def tick(self, value: int, load: int) -> None:
+        """Samples the value to store."""
+        self.next = value if load else self.value
+
+    def tock(self) -> None:
+        """Stores the sampled value."""
+        self.value = self.next
+
+
+class Bit(Register):
+    """1 bit register."""
+
+    inputs = [("in", 1), ("load", 1)]
+    outputs = [("out", 1)]
+
+
+class PC(Register):
+    """Program counter that is reset, loaded, or incremented in this order of priority."""
+
+    inputs = [("in", 16), ("load", 1), ("inc", 1), ("reset", 1)]
+
+    def tick(self, value: int, load: int, inc: int, reset: int) -> None:
+        """Samples the next value of the counter."""
+        if reset:
+            self.next = 0
+        elif load:
+            self.next = value
+        elif inc:
+            self.next = (self.value + 1) & 0xFFFF
+        else:
+            self.next = self.value
+
+
+class RAM8(RAM):
+    """Memory of 8 registers."""
+
+    inputs = [("in", 16), ("load", 1), ("address", 3)]
+    size = 8
+
+
+class RAM64(RAM):
+    """Memory of 64 registers."""
+
+    inputs = [("in", 16), ("load", 1), ("address", 6)]
+    size = 64
+
+
+class RAM512(RAM):
+    """Memory of 512 registers."""
+
+    inputs = [("in", 16), ("load", 1), ("address", 9)]
+    size = 512
+
+
+class RAM4K(RAM):
+    """Memory of 4K registers."""
+
+    inputs = [("in", 16), ("load", 1), ("address", 12)]
+    size = 4096
+
+
+class RAM16K(RAM):
+    """Memory of 16K registers."""
+
+    inputs = [("in", 16), ("load", 1), ("address", 14)]
+    size = 16384
+
+
+class Memory(RAM):
+    """Data memory with the RAM, the screen memory map, and the keyboard memory map."""
+
+    inputs = [("in", 16), ("load", 1), ("address", 15)]
+    size = 0x6000
+
+    def __init__(self):
+        """Creates a cleared memory without a pressed key."""
+        super().__init__()
+        self.key = 0
+
+    def read(self, address: int) -> tuple:
+        """Returns the word at the address, every address from 0x6000 up reads the keyboard."""
+        return (self.memory[address] if address < 0x6000 else self.key),
+
+    def tick(self, value: int, load: int, address: int) -> None:
+        """Samples the word to write, addresses from 0x6000 up wrap around into the screen."""
+        self.pending = (address if address < 0x4000 else 0x4000 | address & 0x1FFF, value) if load else None
+
+
+# Chips that are always builtin, and chips that are built from other chips under another name.
+BUILTIN_MODELS = {"Screen": Screen, "Keyboard": Keyboard, "ROM32K": ROM32K}
+# Behavioral models that can replace the HDL versions of the sequential chips, in the order they build on each other.
+FAST_MODELS = {"Bit": Bit, "Register": Register, "PC": PC, "RAM8": RAM8, "RAM64": RAM64, "RAM512": RAM512,
+               "RAM4K": RAM4K, "RAM16K": RAM16K, "Memory": Memory}
+ALIASES = {"ARegister": "Register", "DRegister": "Register"}
+PRIMITIVES = {
+    "Nand": ChipDefinition("Nand", [("a", 1), ("b", 1)], [("out", 1)]),
+    "DFF": ChipDefinition("DFF", [("in", 1)], [("out", 1)])
+}
+
+
+class ChipLibrary:
+    """HDL Chip Library
+
+    Finds the chip definitions in the HDL files of the given directories.
+    """
+
+    def __init__(self, directories: list = None, models: dict = None):
+        """Indexes the .hdl files of the directories and their subdirectories.
+
+        Chips with a behavioral model class in models are not built from their HDL files.
+        """
+        self.paths = {}
+        self.definitions = {}
+        self.models = dict(BUILTIN_MODELS)
+        if models:
+            self.models.update(models)
+        for directory in directories if directories is not None else [HARDWARE_DIRECTORY]:
+            for root, folders, files in os.walk(directory):
+                folders.sort()
+                for file_name in sorted(files):
+                    if file_name[-4:] == ".hdl":
+                        self.paths.setdefault(file_name[:-4], os.path.join(root, file_name))
+
+    def definition(self, name: str) -> ChipDefinition:
+        """Returns the definition of the chip with the given name."""
+        if name in self.definitions:
+            return self.definitions[name]
+        if name in self.models:
+            model = self.models[name]
+            definition = ChipDefinition(name, model.inputs, model.outputs, model=model)
+        elif name in PRIMITIVES:
+            definition = PRIMITIVES[name]
+        elif name in self.paths:
+            with open(self.paths[name]) as file:
+                definition = parse_hdl(file.read(), self.paths[name])
+        elif name in ALIASES:
+            definition = self.definition(ALIASES[name])
+        else:
+            raise NameError("Unknown Chip " + name)
+        self.definitions[name] = definition
+        return definition
+
+
+class Netlist:
+    """Flattened Chip
+
+    Nand gates, DFFs, and behavioral parts connected by 1 bit nets. Net 0 is false and net 1 is true.
+    """
+
+    def __init__(self, name: str):
+        """Creates an empty netlist with the two constant nets."""
+        self.name = name
+        self.nets = 2
+        # Nand gates as (a, b, out) and DFFs as (in, out) nets.
+        self.nands = []
+        self.dffs = []
+        # Behavioral parts as (model, input nets, output nets) with one list of nets per pin.
+        self.parts = []
+        # Nets of the input and output pins of the chip.
+        self.inputs = {}
+        self.outputs = {}
+        # Nets that are connected together point to a common net.
+        self.parent = [0, 1]
+
+    def new_net(self) -> int:
+        """Returns a new net."""
+        self.parent.append(self.nets)
+        self.nets += 1
+        return self.nets - 1
+
+    def find(self, net: int) -> int:
+        """Returns the net that represents all nets connected to the given net."""
+        parent = self.parent
+        while parent[net] != net:
+            parent[net] = parent[parent[net]]
+            net = parent[net]
+        return net
+
+    def union(self, first: int, second: int) -> None:
+        """Connects two nets. Constant nets always represent their connections."""
+        first = self.find(first)
+        second = self.find(second)
+        if first != second:
+            if first < second:
+                self.parent[second] = first
+            else:
+                self.parent[first] = second
+
+    def canonicalize(self) -> None:
+        """Replaces every net with the net that represents its connections."""
+        find = self.find
+        self.nands = [(find(a), find(b), find(out)) for a, b, out in self.nands]
+        self.dffs = [(find(data), find(out)) for data, out in self.dffs]
+        self.parts = [(model, [[find(net) for net in nets] for nets in inputs],
+                       [[find(net) for net in nets] for nets in outputs]) for model, inputs, outputs in self.parts]
+        self.inputs = {pin: [find(net) for net in nets] for pin, nets in self.inputs.items()}
+        self.outputs = {pin: [find(net) for net in nets] for pin, nets in self.outputs.items()}
+
+    def models(self, name: str = None) -> list:
+        """Returns the behavioral parts, optionally only the ones with the given chip or class name."""
+        return [model for model, _, _ in self.parts
+                if name is None or model.chip_name == name or type(model).__name__ == name]
+
+
+def flatten(library: ChipLibrary, chip_name: str) -> Netlist:
+    """Returns the netlist of the chip with all of its parts expanded down to Nand gates and DFFs."""
+    definition = library.definition(chip_name)
+    netlist = Netlist(chip_name)
+    pins = {}
+    for pin, width in definition.inputs:
+        pins[pin] = netlist.inputs[pin] = [netlist.new_net() for _ in range(width)]
+    for pin, width in definition.outputs:
+        pins[pin] = netlist.outputs[pin] = [netlist.new_net() for _ in range(width)]
+    instantiate(library, netlist, definition, pins)
+    netlist.canonicalize()
+    return netlist
+
+
+def instantiate(library: ChipLibrary, netlist: Netlist, definition: ChipDefinition, pins: dict,
+                chip_name: str = None) -> None:
+    """Adds the gates of a chip whose pins are connected to the given nets.
+
+    The chip name is the name the chip is used under, which differs from the definition for aliases like DRegister.
+    """
+    # Primitive gates and behavioral models end the expansion.
+    if definition.model is not None:
+        model = definition.model()
+        # Test scripts refer to the parts by the chip name they are used under.
+        model.chip_name = chip_name or definition.name
+        netlist.parts.append((model, [pins[pin] for pin, _ in definition.inputs],
+                              [pins[pin] for pin, _ in definition.outputs]))
+        return
+    if definition is PRIMITIVES["Nand"]:
+        netlist.nands.append((pins["a"][0], pins["b"][0], pins["out"][0]))
+        return
+    if definition is PRIMITIVES["DFF"]:
+        netlist.dffs.append((pins["in"][0], pins["out"][0]))
+        return
+
+    # Internal wires are created bit by bit as they are referenced.
+    wires = {}
+
+    def wire_bits(wire: str, start: int, count: int) -> list:
+        """Returns the nets of a range of a pin or an internal wire."""
+        if wire in pins:
+            if start + count > len(pins[wire]):
+                raise NameError("Bus Range Out of Bounds " + wire + " in " + definition.name)
+            return pins[wire][start:start + count]
+        bits = wires.setdefault(wire, {})
+        for bit in range(start, start + count):
+            if bit not in bits:
+                bits[bit] = netlist.new_net()
+        return [bits[bit] for bit in range(start, start + count)]
+
+    for chip_name, connections in definition.parts:
+        part = library.definition(chip_name)
+        widths = dict(part.inputs + part.outputs)
+        outputs = {pin for pin, _ in part.outputs}
+        part_pins = {}
+        for pin, pin_start, pin_end, wire, wire_start, wire_end in connections:
+            if pin not in widths:
+                raise NameError("Unknown Pin " + pin + " of " + chip_name + " in " + definition.name)
+            if pin_start is None:
+                pin_start, pin_end = 0, widths[pin] - 1
+            count = pin_end - pin_start + 1
+            if wire_start is not None and wire_end - wire_start + 1 != count:
+                raise NameError("Bus Width Mismatch " + pin + "=" + wire + " in " + definition.name)
+            nets = part_pins.setdefault(pin, [None] * widths[pin])
+            if wire == "true" or wire == "false":
+                if pin in outputs:
+                    raise NameError("Constant Connected to Output " + pin + " of " + chip_name)
+                targets = [1 if wire == "true" else 0] * count
+            else:
+                targets = wire_bits(wire, wire_start or 0, count)
+            for bit in range(count):
+                if pin in outputs and nets[pin_start + bit] is not None:
+                    # One output bit connected to several wires.
+                    netlist.union(nets[pin_start + bit], targets[bit])
+                else:
+                    nets[pin_start + bit] = targets[bit]
+        # Unconnected inputs are false and unconnected outputs go nowhere.
+        for pin, width in part.inputs:
+            part_pins[pin] = [0 if net is None else net for net in part_pins.get(pin, [None] * width)]
+        for pin, width in part.outputs:
+            part_pins[pin] = [netlist.new_net() if net is None else net for net in part_pins.get(pin, [None] * width)]
+        instantiate(library, netlist, part, part_pins, chip_name)
+
+
+def read_nets(model: BehavioralChip, inputs: list) -> list:
+    """Returns the nets of the read pins of a behavioral part."""
+    names = [pin for pin, _ in model.inputs]
+    return [inputs[names.index(pin)] for pin in model.read_pins]
+
+
+def levelize(netlist: Netlist) -> tuple:
+    """Returns the combinational nodes in evaluation order and the number of logic levels.
+
+    Nodes are the indexes of the Nand gates followed by the indexes of the behavioral parts.
+    DFF outputs, chip inputs, and undriven nets are the sources of the levels.
+    """
+    nands = netlist.nands
+    count = len(nands) + len(netlist.parts)
+    # Inputs of every node and the node that drives every net.
+    node_inputs = [(a, b) for a, b, _ in nands]
+    driver = {out: node for node, (_, _, out) in enumerate(nands)}
+    for index, (model, inputs, outputs) in enumerate(netlist.parts):
+        node_inputs.append([net for nets in read_nets(model, inputs) for net in nets])
+        for nets in outputs:
+            for net in nets:
+                driver[net] = len(nands) + index
+    # Topological order of the nodes, counting the inputs that are not evaluated yet.
+    users = [[] for _ in range(count)]
+    pending = [0] * count
+    for node in range(count):
+        for net in node_inputs[node]:
+            source = driver.get(net)
+            if source is not None:
+                users[source].append(node)
+                pending[node] += 1
+    level = [0] * count
+    ready = [node for node in range(count) if pending[node] == 0]
+    order = []
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for user in users[node]:
+            if level[user] <= level[node]:
+                level[user] = level[node] + 1
+            pending[user] -= 1
+            if pending[user] == 0:
+                ready.append(user)
+    if len(order) != count:
+        raise NameError("Combinational Loop in " + netlist.name)
+    order.sort(key=level.__getitem__)
+    return order, max(level) + 1 if count else 0
+
+
+def optimize_netlist(netlist: Netlist) -> tuple:
+    """Simplifies a netlist in place without changing the values of its outputs.
+
+    Gates with constant or complementary inputs are folded, gates with the same inputs are shared,
+    double negations are removed, and gates that no output, DFF, or behavioral part uses are dropped.
+    Returns the number of gates folded, shared, and dropped.
+    """
+    parent = netlist.parent
+    find = netlist.find
+    # Gates are visited in evaluation order, so their inputs are already simplified.
+    order, _ = levelize(netlist)
+    nands = [netlist.nands[node] for node in order if node < len(netlist.nands)]
+    folded = shared = 0
+    while True:
+        # Gates by their inputs, and the nets that are known to be the negation of each other.
+        gates = {}
+        inverse = {}
+        kept = []
+        for a, b, out in nands:
+            a = find(a)
+            b = find(b)
+            if a > b:
+                a, b = b, a
+            if a == 0:
+                target = 1
+            elif a == 1 and b == 1:
+                target = 0
+            else:
+                # Nand(true, x) is Not(x), which is written as Nand(x, x).
+                if a == 1:
+                    a = b
+                if (a, b) in gates:
+                    parent[out] = gates[a, b]
+                    shared += 1
+                    continue
+                if a == b and a in inverse:
+                    target = inverse[a]
+                elif a != b and inverse.get(a) == b:
+                    target = 1
+                else:
+                    gates[a, b] = out
+                    if a == b:
+                        inverse[a] = out
+                        inverse[out] = a
+                    kept.append((a, b, out))
+                    continue
+            # The output of a removed gate is connected to the net with the same value.
+            parent[out] = target
+            folded += 1
+        nands = kept
+        # DFFs start at 0, so a DFF that only ever loads 0 or its own output stays 0.
+        latches = {}
+        dffs = []
+        for data, out in netlist.dffs:
+            data = find(data)
+            if data == 0 or data == out:
+                parent[out] = 0
+                folded += 1
+            elif data in latches:
+                parent[out] = latches[data]
+                shared += 1
+            else:
+                latches[data] = out
+                dffs.append((data, out))
+        # Folded DFFs can make more gates constant.
+        changed = len(dffs) != len(netlist.dffs)
+        netlist.dffs = dffs
+        if not changed:
+            break
+
+    # Keep the gates that drive the outputs, the DFFs, and the behavioral parts.
+    driver = {out: (a, b) for a, b, out in nands}
+    driver.update((out, (data,)) for data, out in netlist.dffs)
+    live = [find(net) for nets in netlist.outputs.values() for net in nets]
+    live += [find(net) for _, inputs, _ in netlist.parts for nets in inputs for net in nets]
+    used = set(live)
+    while live:
+        for net in driver.get(live.pop(), ()):
+            net = find(net)
+            if net not in used:
+                used.add(net)
+                live.append(net)
+    count = len(nands) + len(netlist.dffs)
+    netlist.nands = [gate for gate in nands if gate[2] in used]
+    netlist.dffs = [dff for dff in netlist.dffs if dff[1] in used]
+    netlist.canonicalize()
+    return folded, shared, count - len(netlist.nands) - len(netlist.dffs)
+
+
+def compile_netlist(netlist: Netlist, order: list):
+    """Returns a Python function that evaluates the combinational nodes of the netlist in the given order.
+
+    The function takes the list of net values, the lane mask, and the behavioral parts.
+    Every net value holds one bit per lane, so a single call evaluates as many input vectors as lanes.
+    """
+    nands = netlist.nands
+    parts = netlist.parts
+
+    def name(net: int) -> str:
+        """Returns the expression of a net."""
+        if net == 0:
+            return "0"
+        if net == 1:
+            return "M"
+        return "n" + str(net)
+
+    def pack(nets: list) -> str:
+        """Returns the expression of a bus value."""
+        return " | ".join(name(net) + (" << " + str(bit) if bit else "") for bit, net in enumerate(nets))
+
+    def node_nets(node: int) -> tuple:
+        """Returns the input and the output nets of a node."""
+        if node < len(nands):
+            a, b, out = nands[node]
+            return (a, b), (out,)
+        model, inputs, outputs = parts[node - len(nands)]
+        return [net for nets in read_nets(model, inputs) for net in nets], [net for nets in outputs for net in nets]
+
+    def node_code(node: int) -> list:
+        """Returns the lines of code of a node."""
+        if node < len(nands):
+            a, b, out = nands[node]
+            if a == b:
+                return [name(out) + " = M ^ " + name(a)]
+            return [name(out) + " = M ^ (" + name(a) + " & " + name(b) + ")"]
+        index = node - len(nands)
+        model, inputs, outputs = parts[index]
+        code = ["r = p[" + str(index) + "].read(" + ", ".join(pack(nets) for nets in read_nets(model, inputs)) + ")"]
+        for position, nets in enumerate(outputs):
+            for bit, net in enumerate(nets):
+                code.append(name(net) + " = r[" + str(position) + "] >> " + str(bit) + " & 1")
+        return code
+
+    # Nets that are read outside of the evaluation: outputs, DFF inputs, and behavioral inputs.
+    stored = {net for nets in netlist.outputs.values() for net in nets}
+    stored.update(data for data, _ in netlist.dffs)
+    for _, inputs, _ in parts:
+        stored.update(net for nets in inputs for net in nets)
+
+    # Split the nodes into functions, nets that cross functions go through the value list.
+    chunks = [order[start:start + CHUNK_SIZE] for start in range(0, len(order), CHUNK_SIZE)] or [[]]
+    defining_chunk = {}
+    crossing = set()
+    for position, chunk in enumerate(chunks):
+        for node in chunk:
+            inputs, outputs = node_nets(node)
+            for net in inputs:
+                if defining_chunk.get(net, position) != position:
+                    crossing.add(net)
+            for net in outputs:
+                defining_chunk[net] = position
+    # Every chunk is compiled on its own, which keeps the memory of the compiler small for large chips.
+    namespace = {}
+    for position, chunk in enumerate(chunks):
+        defined = set()
+        loaded = set()
+        code = []
+        for node in chunk:
+            inputs, outputs = node_nets(node)
+            loaded.update(net for net in inputs if net > 1 and net not in defined)
+            defined.update(outputs)
+            code.extend(node_code(node))
+        saved = sorted(net for net in defined if net > 1 and (net in stored or net in crossing))
+        source = ["def chunk" + str(position) + "(v, M, p):"]
+        source.extend("    " + name(net) + " = v[" + str(net) + "]" for net in sorted(loaded))
+        source.extend("    " + line for line in code)
+        source.extend("    v[" + str(net) + "] = " + name(net) for net in saved)
+        source.append("    pass")
+        exec(compile("\n".join(source) + "\n", "<" + netlist.name + ">", "exec"), namespace)
+    if len(chunks) == 1:
+        namespace["evaluate"] = namespace["chunk0"]
+    else:
+        source = ["def evaluate(v, M, p):"]
+        source.extend("    chunk" + str(position) + "(v, M, p)" for position in range(len(chunks)))
+        exec(compile("\n".join(source) + "\n", "<" + netlist.name + ">", "exec"), namespace)
+    return namespace["evaluate"]
+
+
+class Simulator:
+    """Compiled Chip Simulator
+
+    Evaluates a netlist with generated code and clocks its DFFs and behavioral parts.
+    Every net carries one bit per lane, so independent input vectors can be simulated together.
+    """
+
+    def __init__(self, netlist: Netlist, lanes: int = 1):
+        """Levelizes and compiles the netlist for the given number of lanes."""
+        if lanes > 1 and netlist.parts:
+            raise NameError("Behavioral Parts Need a Single Lane")
+        self.netlist = netlist
+        self.lanes = lanes
+        self.mask = (1 << lanes) - 1
+        # Values of the nets, the true net is set in every lane.
+        self.values = [0] * netlist.nets
+        self.values[1] = self.mask
+        start = time.perf_counter()
+        self.order, self.levels = levelize(netlist)
+        self.evaluate_netlist = compile_netlist(netlist, self.order)
+        self.compile_time = time.perf_counter() - start
+        self.models = [model for model, _, _ in netlist.parts]
+        # DFF inputs are sampled at the rising edge and copied to the outputs at the falling edge.
+        inputs = [data for data, _ in netlist.dffs]
+        self.latch = operator.itemgetter(*inputs) if len(inputs) > 1 else lambda values: tuple(
+            values[net] for net in inputs)
+        self.dff_outputs = [out for _, out in netlist.dffs]
+        self.latched = ()
+
+    def set(self, pin: str, value: int) -> None:
+        """Sets an input pin to the value in every lane."""
+        for bit, net in enumerate(self.netlist.inputs[pin]):
+            self.values[net] = self.mask if value >> bit & 1 else 0
+
+    def get(self, pin: str) -> int:
+        """Returns the value of a pin in the first lane."""
+        nets = self.netlist.outputs[pin] if pin in self.netlist.outputs else self.netlist.inputs[pin]
+        value = 0
+        for bit, net in enumerate(nets):
+            value |= (self.values[net] & 1) << bit
+        return value
+
+    def set_lanes(self, pin: str, bits: list) -> None:
+        """Sets an input pin to different values in the lanes, given as one lane mask per bit."""
+        for net, lanes in zip(self.netlist.inputs[pin], bits):
+            self.values[net] = lanes
+
+    def get_lanes(self, pin: str) -> list:
+        """Returns the lane masks of every bit of a pin."""
+        nets = self.netlist.outputs[pin] if pin in self.netlist.outputs else self.netlist.inputs[pin]
+        return [self.values[net] for net in nets]
+
+    def evaluate(self) -> None:
+        """Evaluates the combinational logic."""
+        self.evaluate_netlist(self.values, self.mask, self.models)
+
+    def tick(self) -> None:
+        """Evaluates the inputs and samples them into the DFFs and the behavioral parts."""
+        self.evaluate()
+        values = self.values
+        if self.dff_outputs:
+            self.latched = self.latch(values)
+        for model, inputs, _ in self.netlist.parts:
+            model.tick(*[sum(values[net] << bit for bit, net in enumerate(nets)) for nets in inputs])
+
+    def tock(self) -> None:
+        """Updates the DFFs and the behavioral parts and evaluates their new outputs."""
+        values = self.values
+        for net, value in zip(self.dff_outputs, self.latched):
+            values[net] = value
+        for model in self.models:
+            model.tock()
+        self.evaluate()
+
+    def clock(self, cycles: int = 1) -> None:
+        """Runs the given number of clock cycles."""
+        for _ in range(cycles):
+            self.tick()
+            self.tock()
+
+
+def select(sel, a, b):
+    """Returns a if sel is 0 and b if sel is 1, for ints and NumPy arrays alike."""
+    return a ^ ((a ^ b) & -sel)
+
+
+def alu(x, y, zx, nx, zy, ny, f, no) -> dict:
+    """Reference model of the ALU."""
+    x = select(zx, x, 0) ^ (0xFFFF & -nx)
+    y = select(zy, y, 0) ^ (0xFFFF & -ny)
+    out = select(f, x & y, (x + y) & 0xFFFF) ^ (0xFFFF & -no)
+    return {"out": out, "zr": (out == 0) * 1, "ng": out >> 15}
+
+
+# Reference models of the combinational chips.
+# They only use operators, so a call evaluates whole NumPy arrays of input vectors.
+REFERENCES = {
+    "Nand": lambda i: {"out": 1 ^ (i["a"] & i["b"])},
+    "Not": lambda i: {"out": 1 ^ i["in"]},
+    "And": lambda i: {"out": i["a"] & i["b"]},
+    "Or": lambda i: {"out": i["a"] | i["b"]},
+    "Xor": lambda i: {"out": i["a"] ^ i["b"]},
+    "Mux": lambda i: {"out": select(i["sel"], i["a"], i["b"])},
+    "DMux": lambda i: {"a": i["in"] & (1 ^ i["sel"]), "b": i["in"] & i["sel"]},
+    "Not16": lambda i: {"out": 0xFFFF ^ i["in"]},
+    "And16": lambda i: {"out": i["a"] & i["b"]},
+    "Or16": lambda i: {"out": i["a"] | i["b"]},
+    "Mux16": lambda i: {"out": select(i["sel"], i["a"], i["b"])},
+    "Or8Way": lambda i: {"out": (i["in"] != 0) * 1},
+    "Mux4Way16": lambda i: {"out": select(i["sel"] >> 1, select(i["sel"] & 1, i["a"], i["b"]),
+                                          select(i["sel"] & 1, i["c"], i["d"]))},
+    "Mux8Way16": lambda i: {"out": select(i["sel"] >> 2,
+                                          select(i["sel"] >> 1 & 1, select(i["sel"] & 1, i["a"], i["b"]),
+                                                 select(i["sel"] & 1, i["c"], i["d"])),
+                                          select(i["sel"] >> 1 & 1, select(i["sel"] & 1, i["e"], i["f"]),
+                                                 select(i["sel"] & 1, i["g"], i["h"])))},
+    "DMux4Way": lambda i: {pin: i["in"] & (i["sel"] == index) for index, pin in enumerate("abcd")},
+    "DMux8Way": lambda i: {pin: i["in"] & (i["sel"] == index) for index, pin in enumerate("abcdefgh")},
+    "HalfAdder": lambda i: {"sum": i["a"] ^ i["b"], "carry": i["a"] & i["b"]},
+    "FullAdder": lambda i: {"sum": i["a"] ^ i["b"] ^ i["c"], "carry": (i["a"] + i["b"] + i["c"]) >> 1},
+    "Add16": lambda i: {"out": (i["a"] + i["b"]) & 0xFFFF},
+    "Inc16": lambda i: {"out": (i["in"] + 1) & 0xFFFF},
+    "ALU": lambda i: alu(i["x"], i["y"], i["zx"], i["nx"], i["zy"], i["ny"], i["f"], i["no"])
+}
+
+
+def pack_lanes(values, width: int) -> list:
+    """Returns one lane mask per bit of a NumPy array of values, lane k holds the value k."""
+    bits = []
+    for bit in range(width):
+        packed = numpy.packbits(((values >> bit) & 1).astype(numpy.uint8), bitorder="little")
+        bits.append(int.from_bytes(packed.tobytes(), "little"))
+    return bits
+
+
+def unpack_lanes(bits: list, lanes: int):
+    """Returns the NumPy array of values of the lane masks of every bit."""
+    values = numpy.zeros(lanes, numpy.int64)
+    for bit, mask in enumerate(bits):
+        unpacked = numpy.unpackbits(numpy.frombuffer(mask.to_bytes(lanes // 8, "little"), numpy.uint8),
+                                    bitorder="little")
+        values |= unpacked.astype(numpy.int64) << bit
+    return values
+
+
+def test_chip(netlist: Netlist, reference, vectors: int = 1 << 20, lanes: int = 1 << 12,
+              exhaustive_bits: int = EXHAUSTIVE_BITS, seed: int = 0, limit: int = 10) -> tuple:
+    """Tests a combinational netlist against a reference model, evaluating as many input vectors as lanes at once.
+
+    Chips with at most exhaustive_bits input bits are tested with every input combination.
+    Otherwise pins narrower than 8 bits are enumerated exhaustively and the wider buses are random.
+    Returns the number of tested vectors, the number of mismatches, and the first mismatches as
+    (inputs, expected outputs, actual outputs) dicts.
+    """
+    if numpy is None:
+        raise NameError("NumPy Is Needed for Bit-Parallel Testing")
+    if netlist.dffs or netlist.parts:
+        raise NameError("Only Combinational Chips Can Be Tested Bit-Parallel")
+    widths = [(pin, len(nets)) for pin, nets in netlist.inputs.items()]
+    total_bits = sum(width for _, width in widths)
+    exhaustive = total_bits <= exhaustive_bits
+    if exhaustive:
+        vectors = 1 << total_bits
+    # Lane masks are packed into bytes.
+    lanes = max(8, min(lanes, (vectors + 7) // 8 * 8))
+    simulator = Simulator(netlist, lanes)
+    rng = numpy.random.default_rng(seed)
+    tested = 0
+    mismatches = 0
+    examples = []
+    while tested < vectors:
+        count = min(lanes, vectors - tested)
+        # Every lane takes the next input combination, the random buses change in every lane.
+        index = numpy.arange(tested, tested + lanes, dtype=numpy.int64)
+        inputs = {}
+        position = 0
+        for pin, width in widths:
+            if exhaustive or width < 8:
+                inputs[pin] = (index >> position) & ((1 << width) - 1)
+                position += width
+            else:
+                inputs[pin] = rng.integers(0, 1 << width, lanes, dtype=numpy.int64)
+        for pin, width in widths:
+            simulator.set_lanes(pin, pack_lanes(inputs[pin], width))
+        simulator.evaluate()
+        expected = reference(inputs)
+        # Compare every output and collect the lanes with a wrong value.
+        wrong = numpy.zeros(lanes, bool)
+        actual = {}
+        for pin in netlist.outputs:
+            actual[pin] = unpack_lanes(simulator.get_lanes(pin), lanes)
+            wrong |= actual[pin] != numpy.broadcast_to(expected[pin], lanes)
+        wrong[count:] = False
+        for lane in numpy.flatnonzero(wrong)[:max(0, limit - len(examples))]:
+            examples.append(({pin: int(values[lane]) for pin, values in inputs.items()},
+                             {pin: int(numpy.broadcast_to(values, lanes)[lane]) for pin, values in expected.items()},
+                             {pin: int(values[lane]) for pin, values in actual.items()}))
+        mismatches += int(wrong.sum())
+        tested += count
+    return tested, mismatches, examples
+
+
+def verify_model(chip_name: str, directories: list = None, cycles: int = 1000, seed: int = 0, limit: int = 10) -> tuple:
+    """Compares the behavioral model of a chip with its HDL version for random clocked inputs.
+
+    The parts of the HDL version use the other models, so the models are verified one level at a time.
+    Addresses come from a small pool, so that the reads return written words.
+    Returns the number of mismatched cycles, and the first mismatches as (cycle, inputs, expected, actual) tuples.
+    """
+    models = {name: model for name, model in FAST_MODELS.items() if name != chip_name}
+    hdl = Simulator(flatten(ChipLibrary(directories, models), chip_name))
+    model = Simulator(flatten(ChipLibrary(directories, {chip_name: FAST_MODELS[chip_name]}), chip_name))
+    inputs = hdl.netlist.inputs
+    rng = random.Random(seed)
+    addresses = [rng.getrandbits(len(inputs["address"])) for _ in range(16)] if "address" in inputs else []
+    mismatches = 0
+    examples = []
+    for cycle in range(cycles):
+        values = {pin: rng.getrandbits(len(nets)) for pin, nets in inputs.items()}
+        if addresses:
+            values["address"] = rng.choice(addresses)
+        outputs = []
+        for simulator in hdl, model:
+            for pin, value in values.items():
+                simulator.set(pin, value)
+            simulator.evaluate()
+            outputs.append({pin: simulator.get(pin) for pin in hdl.netlist.outputs})
+            simulator.clock()
+        if outputs[0] != outputs[1]:
+            mismatches += 1
+            if len(examples) < limit:
+                examples.append((cycle, values, outputs[0], outputs[1]))
+    return mismatches, examples
+
+
+def load_words(file_name: str) -> list:
+    """Returns the machine codes of a .hack file."""
+    with open(file_name) as file:
+        return [int(line, 2) for line in file if line.strip()]
+
+
+def main():
+    """Arranges the compilation and the simulation of a chip."""
+
+    # Parse the command line arguments.
+    arguments = argparse.ArgumentParser(prog="python " + os.path.basename(__file__),
+                                        description="Compiles an HDL chip into Python code and simulates it.")
+    arguments.add_argument("chip", help="chip name or .hdl file")
+    arguments.add_argument("--set", action="append", default=[], metavar="PIN=VALUE",
+                           help="input pin value, can be repeated")
+    arguments.add_argument("--clock", type=int, default=0, help="number of clock cycles to run (default: 0)")
+    arguments.add_argument("--rom", help=".hack program to load into the ROM32K parts")
+    arguments.add_argument("--fast", action="store_true",
+                           help="replace the registers and the memories with behavioral models")
+    arguments.add_argument("--verify", action="store_true",
+                           help="compare the behavioral model of the chip with its HDL version for --clock cycles")
+    arguments.add_argument("--dump", metavar="START:END",
+                           help="memory range of the behavioral data memory to print after running")
+    arguments.add_argument("--optimize", action="store_true",
+                           help="remove constant, duplicate, and unused gates before compiling")
+    arguments.add_argument("--test", action="store_true",
+                           help="test a combinational chip bit-parallel against its reference model")
+    arguments.add_argument("--vectors", type=int, default=1 << 20,
+                           help="random test vectors when the chip is too wide to test exhaustively (default: 1M)")
+    arguments.add_argument("--lanes", type=int, default=1 << 12,
+                           help="test vectors evaluated by one pass over the netlist (default: 4096)")
+    arguments.add_argument("--exhaustive-bits", type=int, default=EXHAUSTIVE_BITS,
+                           help="test every input combination up to this many input bits (default: 24)")
+    arguments.add_argument("--seed", type=int, default=0, help="seed of the random test vectors (default: 0)")
+    arguments.add_argument("--hdl-dir", action="append", default=[],
+                           help="directory to search for chips (default: the Hardware directory)")
+    options = arguments.parse_args()
+    if options.test and numpy is None:
+        arguments.error("--test requires NumPy")
+
+    # Find the chip and flatten it.
+    chip_name = options.chip
+    directories = options.hdl_dir or [HARDWARE_DIRECTORY]
+    if chip_name[-4:] == ".hdl":
+        directories = [os.path.dirname(os.path.abspath(chip_name))] + directories
+        chip_name = os.path.basename(chip_name)[:-4]
+
+    # Verify the behavioral model against the HDL version.
+    if options.verify:
+        if chip_name not in FAST_MODELS:
+            raise NameError("No Behavioral Model for " + chip_name)
+        cycles = options.clock or 1000
+        mismatches, examples = verify_model(chip_name, directories, cycles, options.seed)
+        print(chip_name + ": " + str(cycles) + " cycles, " + str(mismatches) + " mismatches")
+        for cycle, inputs, expected, actual in examples:
+            print("  cycle " + str(cycle) + " inputs " + str(inputs) + " expected " + str(expected) +
+                  " got " + str(actual))
+        return
+
+    start = time.perf_counter()
+    netlist = flatten(ChipLibrary(directories, FAST_MODELS if options.fast else None), chip_name)
+    flatten_time = time.perf_counter() - start
+    if options.optimize:
+        start = time.perf_counter()
+        gates = len(netlist.nands)
+        folded, shared, dropped = optimize_netlist(netlist)
+        print("Optimized " + str(gates) + " to " + str(len(netlist.nands)) + " Nand gates (" + str(folded) +
+              " folded, " + str(shared) + " shared, " + str(dropped) + " dropped) in " +
+              format(time.perf_counter() - start, ".3f") + " s")
+
+    # Test the chip and report the mismatches.
+    if options.test:
+        if chip_name not in REFERENCES:
+            raise NameError("No Reference Model for " + chip_name)
+        start = time.perf_counter()
+        tested, mismatches, examples = test_chip(netlist, REFERENCES[chip_name], options.vectors, options.lanes,
+                                                 options.exhaustive_bits, options.seed)
+        elapsed = time.perf_counter() - start
+        exhaustive = sum(len(nets) for nets in netlist.inputs.values()) <= options.exhaustive_bits
+        print(chip_name + ": " + str(tested) + (" exhaustive" if exhaustive else " random") + " vectors in " +
+              format(elapsed, ".3f") + " s, " + str(mismatches) + " mismatches")
+        for inputs, expected, actual in examples:
+            print("  inputs " + str(inputs) + " expected " + str(expected) + " got " + str(actual))
+        return
+
+    simulator = Simulator(netlist)
+    print("Nand gates: " + str(len(netlist.nands)) + ", DFFs: " + str(len(netlist.dffs)) +
+          ", behavioral parts: " + str(len(netlist.parts)) + ", levels: " + str(simulator.levels))
+    print("Flattened in " + format(flatten_time, ".3f") + " s, compiled in " +
+          format(simulator.compile_time, ".3f") + " s")
+
+    # Set the inputs and run the clock.
+    if options.rom:
+        for rom in netlist.models("ROM32K"):
+            rom.load(load_words(options.rom))
+    for assignment in options.set:
+        pin, _, value = assignment.partition("=")
+        simulator.set(pin, int(value, 0))
+    start = time.perf_counter()
+    simulator.evaluate()
+    simulator.clock(options.clock)
+    elapsed = time.perf_counter() - start
+    if options.clock:
+        print(str(options.clock) + " cycles in " + format(elapsed, ".3f") + " s")
+    for pin in netlist.outputs:
+        print(pin + " = " + str(simulator.get(pin)))
+    if options.dump:
+        memories = netlist.models("Memory") + netlist.models("RAM16K")
+        if not memories:
+            raise NameError("Memory Dump Needs a Behavioral Memory")
+        start, _, end = options.dump.partition(":")
+        for address in range(int(start), int(end or start) + (0 if end else 1)):
+            print("RAM[" + str(address) + "] = " + str(memories[0].memory[address]))
+
+
+if __name__ == "__main__":
+    main()
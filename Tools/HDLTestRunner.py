@@ -0,0 +1,428 @@
+# File: HDLTestRunner.py
+# -----
+# Author: Ihsan TOPALOGLU (itopaloglu83@gmail.com)
+# Date: 18 October 2026
+# Course: Nand to Tetris, Part 1
+#
+# Summary: Runs the tests of all HDL chips in parallel and reports the time of every chip.
+#          Chips with a .tst script are run by a test script interpreter and compared with their .cmp file,
+#          the others are checked against the reference models and the behavioral models of the simulator.
+#          Results are cached by the contents of the chip and all of its sub-chips.
+#
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from HDLSimulator import (ALIASES, COMMENT, FAST_MODELS, HARDWARE_DIRECTORY, REFERENCES, ChipLibrary, Simulator,
+                          flatten, load_words, numpy, test_chip, verify_model)
+
+# Sources whose changes invalidate the cached results.
+SOURCES = [os.path.abspath(__file__), os.path.join(os.path.dirname(os.path.abspath(__file__)), "HDLSimulator.py")]
+
+# Tokens of the test scripts and the output formats like out%B3.16.3.
+SCRIPT_TOKEN = re.compile(r"[{},;]|[^\s{},;]+")
+OUTPUT_FORMAT = re.compile(r"(.+)%([BDXS])(\d+)\.(\d+)\.(\d+)$")
+
+
+class TestScript:
+    """HDL Test Script
+
+    Runs the commands of a .tst file on a simulated chip and compares the output lines with the .cmp file.
+    """
+
+    def __init__(self, path: str, directories: list = None, gate_level: bool = False):
+        """Reads the script, the chips are searched next to it first."""
+        self.path = path
+        self.directory = os.path.dirname(os.path.abspath(path))
+        self.directories = [self.directory] + (directories or [HARDWARE_DIRECTORY])
+        # Sub-chips use the verified behavioral models unless the whole chip is simulated at gate level.
+        self.gate_level = gate_level
+        self.simulator = None
+        self.compare_file = None
+        # Output columns as (pin, format, left padding, width, right padding) and the output lines.
+        self.columns = []
+        self.lines = []
+        # Clock cycles run, and whether the clock is between a tick and a tock.
+        self.time = 0
+        self.high = False
+        with open(path) as file:
+            self.tokens = SCRIPT_TOKEN.findall(COMMENT.sub("", file.read()))
+
+    def run(self) -> tuple:
+        """Runs the script and returns the number of output lines and the first mismatched line number or None."""
+        self.execute(self.tokens)
+        compare_file = self.compare_file or os.path.splitext(self.path)[0] + ".cmp"
+        if not os.path.exists(compare_file):
+            return len(self.lines), None
+        with open(compare_file) as file:
+            expected = [line for line in file.read().splitlines() if line.strip()]
+        for number, (actual, line) in enumerate(zip(self.lines, expected), 1):
+            if not match_line(actual, line):
+                return len(self.lines), number
+        if len(self.lines) != len(expected):
+            return len(self.lines), min(len(self.lines), len(expected)) + 1
+        return len(self.lines), None
+
+    def execute(self, tokens: list) -> None:
+        """Executes the commands, which end with a comma or a semicolon, and the repeat blocks."""
+        command = []
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            index += 1
+            if token == "{":
+                # Find the end of the block, blocks can be nested.
+                start = index
+                depth = 1
+                while depth:
+                    if index == len(tokens):
+                        raise NameError("Unclosed Block in " + self.path)
+                    depth += {"{": 1, "}": -1}.get(tokens[index], 0)
+                    index += 1
+                if len(command) != 2 or command[0] != "repeat":
+                    raise NameError("Unsupported Block " + " ".join(command))
+                for _ in range(int(command[1])):
+                    self.execute(tokens[start:index - 1])
+                command = []
+            elif token == "," or token == ";":
+                if command:
+                    self.command(command)
+                command = []
+            else:
+                command.append(token)
+        if command:
+            self.command(command)
+
+    def command(self, words: list) -> None:
+        """Executes a single command."""
+        name = words[0]
+        if name == "load":
+            self.load(words[1])
+        elif name == "compare-to":
+            self.compare_file = os.path.join(self.directory, words[1])
+        elif name == "output-list":
+            self.columns = [parse_column(word) for word in words[1:]]
+            self.lines.append("|" + "|".join(pin.center(left + width + right)[:left + width + right]
+                                             for pin, _, left, width, right in self.columns) + "|")
+        elif name == "set":
+            self.set(words[1], words[2])
+        elif name == "eval":
+            self.simulator.evaluate()
+        elif name == "tick":
+            self.simulator.tick()
+            self.high = True
+        elif name == "tock":
+            self.simulator.tock()
+            self.time += 1
+            self.high = False
+        elif name == "output":
+            self.lines.append("|" + "|".join(" " * left + self.format(pin, kind, width) + " " * right
+                                             for pin, kind, left, width, right in self.columns) + "|")
+        elif len(words) == 3 and words[1] == "load":
+            # Programs are loaded into the instruction memories like ROM32K load Max.hack.
+            for model in self.part(words[0]):
+                model.load(load_words(os.path.join(self.directory, words[2])))
+        elif name not in ("output-file", "echo", "clear-echo", "breakpoint", "clear-breakpoints"):
+            raise NameError("Unsupported Script Command " + name)
+
+    def load(self, file_name: str) -> None:
+        """Flattens and compiles the chip of an .hdl file."""
+        chip_name = os.path.basename(file_name)[:-4] if file_name[-4:] == ".hdl" else file_name
+        models = None if self.gate_level else {name: model for name, model in FAST_MODELS.items()
+                                               if name != chip_name}
+        self.simulator = Simulator(flatten(ChipLibrary(self.directories, models), chip_name))
+
+    def part(self, name: str) -> list:
+        """Returns the behavioral parts used under the given chip name, like DRegister or PC."""
+        # At gate level the registers and the memories are DFFs, which have no values to refer to.
+        if self.gate_level:
+            raise NameError("Part Access Needs the Behavioral Models, Run Without --gate-level: " + name)
+        parts = self.simulator.netlist.models(name)
+        # The RAM16K of the data memory is the lower part of the Memory model.
+        if not parts and name == "RAM16K":
+            parts = self.simulator.netlist.models("Memory")
+        if not parts:
+            raise NameError("Unknown Part " + name)
+        return parts
+
+    def part_word(self, pin: str) -> tuple:
+        """Returns the part and the memory index of a reference like RAM16K[3], or None for a register like PC[]."""
+        name, _, index = pin[:-1].partition("[")
+        part = self.part(name)[0]
+        # Registers have a single value, so ARegister[0] and ARegister[] are the same.
+        if not hasattr(part, "memory"):
+            return part, None
+        if not index:
+            raise NameError("Memory Index Needed for " + pin)
+        return part, int(index)
+
+    def set(self, pin: str, text: str) -> None:
+        """Sets an input pin, or a register or memory word like RAM16K[3], to a value like %B101 or -1."""
+        if text[:2] in ("%B", "%X", "%D"):
+            value = int(text[2:], {"B": 2, "X": 16, "D": 10}[text[1]])
+        else:
+            value = int(text)
+        if "[" in pin:
+            part, index = self.part_word(pin)
+            if index is None:
+                part.value = value & (1 << part.outputs[0][1]) - 1
+            else:
+                part.memory[index] = value & 0xFFFF
+        elif pin in self.simulator.netlist.inputs:
+            self.simulator.set(pin, value & (1 << len(self.simulator.netlist.inputs[pin])) - 1)
+        else:
+            raise NameError("Unknown Input Pin " + pin)
+
+    def format(self, pin: str, kind: str, width: int) -> str:
+        """Returns the value of a pin in the given output format."""
+        if pin == "time":
+            return (str(self.time) + ("+" if self.high else "")).ljust(width)
+        if "[" in pin:
+            part, index = self.part_word(pin)
+            value = part.value if index is None else part.memory[index]
+            bits = part.outputs[0][1]
+        else:
+            netlist = self.simulator.netlist
+            if pin not in netlist.inputs and pin not in netlist.outputs:
+                raise NameError("Unknown Pin " + pin)
+            value = self.simulator.get(pin)
+            bits = len(netlist.outputs[pin] if pin in netlist.outputs else netlist.inputs[pin])
+        if kind == "B":
+            return format(value, "b").zfill(width)[-width:]
+        if kind == "X":
+            return format(value, "X").zfill(width)[-width:]
+        if kind == "D":
+            # 16 bit values are printed in two's complement.
+            return str(value - 65536 if bits == 16 and value & 0x8000 else value).rjust(width)
+        return str(value).ljust(width)
+
+
+def parse_column(word: str) -> tuple:
+    """Returns the (pin, format, left padding, width, right padding) of an output-list entry."""
+    column = OUTPUT_FORMAT.match(word)
+    if column is None:
+        # Pins without a format are printed in binary.
+        return word, "B", 1, 1, 1
+    pin, kind, left, width, right = column.groups()
+    return pin, kind, int(left), int(width), int(right)
+
+
+def match_line(actual: str, expected: str) -> bool:
+    """Returns whether an output line matches a compare line cell by cell, ignoring the padding of the cells.
+
+    The * characters of a compare cell match any character, and a cell of only * characters matches any value.
+    """
+    actual = actual.split("|")
+    expected = expected.split("|")
+    if len(actual) != len(expected):
+        return False
+    for cell, wanted in zip(actual, expected):
+        cell = cell.strip()
+        wanted = wanted.strip()
+        if wanted and wanted.strip("*") == "":
+            continue
+        if len(cell) != len(wanted) or any(letter != "*" and letter != character
+                                           for character, letter in zip(cell, wanted)):
+            return False
+    return True
+
+
+def chip_files(library: ChipLibrary, chip_name: str) -> list:
+    """Returns the HDL files of a chip and all of its transitive sub-chips."""
+    files = set()
+    pending = [chip_name]
+    seen = {chip_name}
+    while pending:
+        name = pending.pop()
+        try:
+            definition = library.definition(name)
+        except NameError:
+            # Unknown chips are reported by the test itself.
+            continue
+        if definition.path is not None:
+            files.add(definition.path)
+        for part, _ in definition.parts or []:
+            for sub_chip in (part, ALIASES.get(part)):
+                if sub_chip is not None and sub_chip not in seen:
+                    seen.add(sub_chip)
+                    pending.append(sub_chip)
+    return sorted(files)
+
+
+def test_files(script: str) -> list:
+    """Returns the test script, its compare file, and the programs it loads."""
+    if script is None:
+        return []
+    directory = os.path.dirname(script)
+    with open(script) as file:
+        words = SCRIPT_TOKEN.findall(COMMENT.sub("", file.read()))
+    files = [script, os.path.splitext(script)[0] + ".cmp"]
+    files += [os.path.join(directory, word) for word in words if word[-4:] in (".cmp", ".hack")]
+    return sorted(set(path for path in files if os.path.exists(path)))
+
+
+def test_key(library: ChipLibrary, chip_name: str, script: str, variant: str) -> str:
+    """Returns the cache key of a chip test, which changes with any file the result depends on."""
+    digest = hashlib.sha256()
+    digest.update((chip_name + "\n" + variant + "\n").encode())
+    for path in SOURCES + chip_files(library, chip_name) + test_files(script):
+        digest.update((os.path.basename(path) + "\n").encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def run_test(chip_name: str, directories: list, script: str, options: dict) -> dict:
+    """Tests a chip with its test script, its reference model, or its behavioral model.
+
+    Returns the status, the kind of check, the details, and the time of the test.
+    """
+    start = time.perf_counter()
+    try:
+        if script is not None:
+            check = "script"
+            lines, mismatch = TestScript(script, directories, options["gate_level"]).run()
+            status = "passed" if mismatch is None else "failed"
+            detail = str(lines) + " lines" + ("" if mismatch is None else ", mismatch at line " + str(mismatch))
+        elif chip_name in REFERENCES and numpy is not None:
+            check = "reference"
+            netlist = flatten(ChipLibrary(directories), chip_name)
+            tested, mismatches, _ = test_chip(netlist, REFERENCES[chip_name], options["vectors"],
+                                              seed=options["seed"])
+            status = "failed" if mismatches else "passed"
+            detail = str(tested) + " vectors, " + str(mismatches) + " mismatches"
+        elif chip_name in FAST_MODELS:
+            check = "model"
+            mismatches, _ = verify_model(chip_name, directories, options["cycles"], options["seed"])
+            status = "failed" if mismatches else "passed"
+            detail = str(options["cycles"]) + " cycles, " + str(mismatches) + " mismatches"
+        elif chip_name in REFERENCES:
+            check = "-"
+            status = "skipped"
+            detail = "NumPy not installed"
+        else:
+            check = "-"
+            status = "skipped"
+            detail = "no test script or reference model"
+    except Exception as error:
+        check = "script" if script is not None else "-"
+        status = "error"
+        detail = type(error).__name__ + ": " + str(error)
+    return {"status": status, "check": check, "detail": detail, "time": time.perf_counter() - start}
+
+
+def load_cache(file_name: str) -> dict:
+    """Returns the cached results by chip name."""
+    try:
+        with open(file_name) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(file_name: str, results: dict) -> None:
+    """Writes the cached results, readers never see a partial file."""
+    with open(file_name + ".tmp", "w") as file:
+        json.dump(results, file, indent=1, sort_keys=True)
+    os.replace(file_name + ".tmp", file_name)
+
+
+def main():
+    """Arranges the discovery, the parallel execution, and the report of the chip tests."""
+
+    # Parse the command line arguments.
+    arguments = argparse.ArgumentParser(prog="python " + os.path.basename(__file__),
+                                        description="Tests all HDL chips in parallel and reports their times.")
+    arguments.add_argument("chips", nargs="*", help="chips to test (default: every chip that is found)")
+    arguments.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                           help="number of processes that run the tests (default: the number of CPUs)")
+    arguments.add_argument("--cache", help="file of the cached results (default: .hdltest.json in the first "
+                                           "HDL directory)")
+    arguments.add_argument("--force", action="store_true", help="run the tests of unchanged chips again")
+    arguments.add_argument("--gate-level", action="store_true",
+                           help="simulate the sub-chips of the test scripts at gate level instead of with the "
+                                "behavioral models")
+    arguments.add_argument("--vectors", type=int, default=1 << 20,
+                           help="test vectors of the reference model checks (default: 1M)")
+    arguments.add_argument("--cycles", type=int, default=1000,
+                           help="clock cycles of the behavioral model checks (default: 1000)")
+    arguments.add_argument("--seed", type=int, default=0, help="seed of the random tests (default: 0)")
+    arguments.add_argument("--hdl-dir", action="append", default=[],
+                           help="directory to search for chips and tests (default: the Hardware directory)")
+    options = arguments.parse_args()
+
+    # Find the chips and their test scripts.
+    start = time.perf_counter()
+    directories = [os.path.abspath(directory) for directory in options.hdl_dir] or [HARDWARE_DIRECTORY]
+    library = ChipLibrary(directories)
+    chips = options.chips or sorted(library.paths)
+    for chip_name in chips:
+        if chip_name not in library.paths:
+            raise NameError("Unknown Chip " + chip_name)
+    scripts = {}
+    for chip_name in chips:
+        script = library.paths[chip_name][:-4] + ".tst"
+        scripts[chip_name] = script if os.path.exists(script) else None
+    settings = {"gate_level": options.gate_level, "vectors": options.vectors, "cycles": options.cycles,
+                "seed": options.seed}
+    # Chips with a reference model are only tested with NumPy, so its availability is a part of the cache key.
+    variant = json.dumps({**settings, "numpy": numpy is not None}, sort_keys=True)
+
+    # Chips whose files did not change keep their cached results.
+    cache_file = options.cache or os.path.join(directories[0], ".hdltest.json")
+    cache = load_cache(cache_file)
+    keys = {chip_name: test_key(library, chip_name, scripts[chip_name], variant) for chip_name in chips}
+    results = {}
+    cached = set()
+    for chip_name in chips:
+        entry = cache.get(chip_name)
+        if not options.force and entry is not None and entry.get("key") == keys[chip_name]:
+            results[chip_name] = entry
+            cached.add(chip_name)
+    pending = [chip_name for chip_name in chips if chip_name not in cached]
+    # The slowest tests start first, so the processes finish together.
+    pending.sort(key=lambda chip_name: -cache.get(chip_name, {}).get("time", 0))
+
+    # Run the remaining tests in a process pool.
+    if options.jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+            futures = {executor.submit(run_test, chip_name, directories, scripts[chip_name], settings): chip_name
+                       for chip_name in pending}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+    else:
+        for chip_name in pending:
+            results[chip_name] = run_test(chip_name, directories, scripts[chip_name], settings)
+    for chip_name in pending:
+        results[chip_name]["key"] = keys[chip_name]
+        cache[chip_name] = results[chip_name]
+    save_cache(cache_file, cache)
+    elapsed = time.perf_counter() - start
+
+    # Report the chips from the slowest to the fastest.
+    width = max(len(chip_name) for chip_name in chips) if chips else 0
+    for chip_name in sorted(chips, key=lambda chip_name: -results[chip_name]["time"]):
+        result = results[chip_name]
+        print(chip_name.ljust(width) + "  " + result["status"].ljust(7) + "  " + result["check"].ljust(9) +
+              format(result["time"], "8.3f") + " s" + ("  cached" if chip_name in cached else "        ") +
+              "  " + result["detail"])
+    counts = {}
+    for result in results.values():
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    test_time = sum(results[chip_name]["time"] for chip_name in pending)
+    print(", ".join(str(count) + " " + status for status, count in sorted(counts.items())) + ", " +
+          str(len(cached)) + " cached")
+    print("Ran " + str(len(pending)) + " tests taking " + format(test_time, ".3f") + " s in " +
+          format(elapsed, ".3f") + " s with " + str(options.jobs) + " processes")
+    if counts.get("failed") or counts.get("error"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
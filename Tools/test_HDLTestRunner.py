@@ -0,0 +1,123 @@
+# File: test_HDLTestRunner.py
+# -----
+# Author: Ihsan TOPALOGLU (itopaloglu83@gmail.com)
+# Date: 18 October 2026
+# Course: Nand to Tetris
+#
+# Summary: Tests of the HDL test-script runner with the part references of the course test scripts.
+#
+
+import os
+import sys
+
+import pytest
+
+import HDLTestRunner
+from HDLSimulator import HARDWARE_DIRECTORY
+
+sys.path.insert(0, os.path.join(HARDWARE_DIRECTORY, "Project 06"))
+from HackAssembler import assemble  # noqa: E402
+
+# Beginning of CPU.tst, DRegister[] is the D register of the CPU.
+CPU_SCRIPT = """
+load CPU.hdl,
+output-file CPU.out,
+compare-to CPU.cmp,
+output-list time%S0.4.0 inM%D0.6.0 instruction%B0.16.0 reset%B2.1.2 outM%D1.6.0 writeM%B3.1.3 addressM%D0.5.0 pc%D0.5.0 DRegister[]%D1.6.1;
+
+set instruction %B0011000000111001, // @12345
+tick, output, tock, output;
+
+set instruction %B1110110000010000, // D=A
+tick, output, tock, output;
+
+set instruction %B0101101110100000, // @23456
+tick, output, tock, output;
+
+set instruction %B1110000111010000, // D=A-D
+tick, output, tock, output;
+"""
+
+CPU_COMPARE = """
+|time| inM  |  instruction   |reset| outM  |writeM |addre| pc  |DRegiste|
+|0+  |     0|0011000000111001|  0  |*******|   0   |    0|    0|      0 |
+|1   |     0|0011000000111001|  0  |*******|   0   |12345|    1|      0 |
+|1+  |     0|1110110000010000|  0  |*******|   0   |12345|    1|      0 |
+|2   |     0|1110110000010000|  0  |*******|   0   |12345|    2|  12345 |
+|2+  |     0|0101101110100000|  0  |*******|   0   |12345|    2|  12345 |
+|3   |     0|0101101110100000|  0  |*******|   0   |23456|    3|  12345 |
+|3+  |     0|1110000111010000|  0  |*******|   0   |23456|    3|  12345 |
+|4   |     0|1110000111010000|  0  |*******|   0   |23456|    4|  11111 |
+"""
+
+# Beginning of ComputerAdd.tst, ARegister[0], DRegister[0], and PC[] are the registers of the CPU.
+COMPUTER_SCRIPT = """
+load Computer.hdl,
+output-file ComputerAdd.out,
+compare-to ComputerAdd.cmp,
+output-list time%S1.4.1 reset%B2.1.2 ARegister[0]%D1.7.1 DRegister[0]%D1.7.1 PC[]%D0.4.0 RAM16K[0]%D1.7.1 RAM16K[1]%D1.7.1 RAM16K[2]%D1.7.1;
+
+// Adds the two constants 2 and 3 and writes the result in RAM[0].
+ROM32K load Add.hack,
+output;
+
+repeat 6 {
+    tick, tock, output;
+}
+
+// Reset the PC
+set reset 1,
+set RAM16K[0] 0,
+tick, tock, output;
+"""
+
+COMPUTER_COMPARE = """
+| time |reset|ARegister|DRegister|PC[]|RAM16K[0]|RAM16K[1]|RAM16K[2]|
+| 0    |  0  |       0 |       0 |   0|       0 |       0 |       0 |
+| 1    |  0  |       2 |       0 |   1|       0 |       0 |       0 |
+| 2    |  0  |       2 |       2 |   2|       0 |       0 |       0 |
+| 3    |  0  |       3 |       2 |   3|       0 |       0 |       0 |
+| 4    |  0  |       3 |       5 |   4|       0 |       0 |       0 |
+| 5    |  0  |       0 |       5 |   5|       0 |       0 |       0 |
+| 6    |  0  |       0 |       5 |   6|       5 |       0 |       0 |
+| 7    |  1  |       0 |       5 |   0|       0 |       0 |       0 |
+"""
+
+ADD_PROGRAM = "@2\nD=A\n@3\nD=D+A\n@0\nM=D\n"
+
+
+def write_files(directory, files: dict) -> None:
+    """Writes the given test files into the directory."""
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w") as file:
+            file.write(text)
+
+
+def test_cpu_script(tmp_path):
+    """CPU.tst reads the D register of the CPU through DRegister[]."""
+    write_files(tmp_path, {"CPU.tst": CPU_SCRIPT, "CPU.cmp": CPU_COMPARE})
+    assert HDLTestRunner.TestScript(str(tmp_path / "CPU.tst")).run() == (9, None)
+
+
+def test_computer_script(tmp_path):
+    """ComputerAdd.tst reads the registers through ARegister[0], DRegister[0], and PC[] and writes RAM16K[0]."""
+    write_files(tmp_path, {"ComputerAdd.tst": COMPUTER_SCRIPT, "ComputerAdd.cmp": COMPUTER_COMPARE,
+                           "Add.hack": "".join(format(word, "016b") + "\n" for word in assemble(ADD_PROGRAM))})
+    assert HDLTestRunner.TestScript(str(tmp_path / "ComputerAdd.tst")).run() == (9, None)
+
+
+def test_set_register(tmp_path):
+    """Registers are written through their values, the index of a register is ignored."""
+    write_files(tmp_path, {"Set.tst": "load CPU.hdl, set DRegister[] 7, set ARegister[0] -1, set PC[] 3;"})
+    script = HDLTestRunner.TestScript(str(tmp_path / "Set.tst"))
+    script.run()
+    assert script.format("DRegister[]", "D", 6) == "     7"
+    assert script.format("ARegister[]", "D", 6) == "    -1"
+    assert script.format("PC[0]", "D", 6) == "     3"
+
+
+def test_gate_level_part_access(tmp_path):
+    """At gate level there are no behavioral parts, so part references fail with a clear error."""
+    write_files(tmp_path, {"CPU.tst": CPU_SCRIPT, "CPU.cmp": CPU_COMPARE})
+    with pytest.raises(NameError, match="Run Without --gate-level: DRegister"):
+        HDLTestRunner.TestScript(str(tmp_path / "CPU.tst"), gate_level=True).run()